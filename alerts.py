@@ -0,0 +1,293 @@
+"""倒计时提醒：为每个机制声明到达某个剩余秒数时执行的动作
+
+    [{"at": 3, "sound": "warn.wav"},
+     {"at": 5, "notify": "准备躲圈"},
+     {"at": 0, "webhook": "http://127.0.0.1:8080/hook"},
+     {"at": 1, "command": "scripts/dodge.bat", "timeout": 2}]
+    sound   播放声音文件
+    notify  桌面通知
+    webhook POST一段JSON（mechanic/threshold/value）到本地聊天机器人等
+    command 运行脚本，环境变量 PT_MECHANIC / PT_THRESHOLD / PT_VALUE 传入机制信息
+
+timers.json 中机制的 alerts（dict格式为 提醒）字段只接受 notify 和程序目录下的 sound 文件名：
+目录会从更新服务器自动同步，不能让发布目录的人在每台电脑上运行命令或访问任意地址。
+webhook、command 和任意路径的声音只从用户自己的配置文件读取（用户数据目录下的 config/alerts.json）：
+    {"机制名称": [提醒, ...], "BOSS/机制名称": [提醒, ...]}
+带BOSS的键只作用于该BOSS下的同名机制，优先于只写机制名称的键。
+倒计时从高于at变为不高于at时触发一次（推进延迟跳过了几秒也会触发），每次循环都会再次触发。
+
+动作在固定数量的后台线程中执行，队列已满时直接丢弃并计数；每个动作都有超时，
+慢的或卡住的动作只会占用一个后台线程，不会拖慢计时器推进和界面重绘。
+"""
+import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from app_paths import data_dir, resource_path
+from timer_engine import RUNNING
+
+ACTIONS = ("sound", "notify", "webhook", "command")
+LOCAL_ALERTS = "alerts.json"
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_WORKERS = 2
+QUEUE_LIMIT = 32
+
+AlertSpec = namedtuple('AlertSpec', 'at action target timeout')
+
+
+def catalog_allowed(action, target):
+    """目录中允许的动作：通知，以及只给出文件名、从程序目录查找的声音"""
+    if action == "notify":
+        return True
+    return (action == "sound" and isinstance(target, str) and target not in ("", ".", "..")
+            and not any(ch in target for ch in "/\\:"))
+
+
+def normalize_alerts(value, trusted=False):
+    """把提醒列表统一为AlertSpec元组；无法识别的项被忽略。
+    trusted为False（目录中的提醒）时不接受webhook、command和声音文件路径"""
+    if not value:
+        return ()
+    if isinstance(value, dict):
+        value = [value]
+    alerts = []
+    for item in value:
+        if not isinstance(item, dict):
+            continue
+        action = next((name for name in ACTIONS if item.get(name)), None)
+        if action is None:
+            continue
+        target = item[action]
+        if isinstance(target, list):
+            target = tuple(str(part) for part in target)
+        if not trusted and not catalog_allowed(action, target):
+            continue
+        try:
+            at = int(item.get("at", 0))
+            timeout = float(item.get("timeout", DEFAULT_TIMEOUT))
+        except (TypeError, ValueError):
+            continue
+        alerts.append(AlertSpec(at, action, target, timeout))
+    return tuple(alerts)
+
+
+def local_alerts_path():
+    return os.path.join(data_dir('config'), LOCAL_ALERTS)
+
+
+def load_local_alerts(path=None):
+    """读取用户自己的提醒配置，返回 {机制名称或"BOSS/机制名称": (AlertSpec, ...)}；文件不存在时为空"""
+    path = path or local_alerts_path()
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {str(key): normalize_alerts(value, trusted=True) for key, value in data.items()}
+    except Exception as e:
+        print(f"Error loading alerts: {e}")
+        return {}
+
+
+class HookStats:
+    """单个提醒动作的执行统计"""
+    __slots__ = ('count', 'failures', 'timeouts', 'dropped', 'last_ms', 'max_ms', 'total_ms', 'max_wait_ms')
+
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.dropped = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def play_sound(path, timeout):
+    import subprocess
+    path = resource_path(path) if not os.path.isabs(path) else path
+    if sys.platform == 'win32':
+        import winsound
+        winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+        return
+    for player in ("paplay", "aplay", "afplay"):
+        if shutil.which(player):
+            subprocess.run([player, path], timeout=timeout, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return
+    raise OSError("no sound player found")
+
+
+def desktop_notify(title, text, timeout):
+    """没有界面提供的通知方式时使用系统命令"""
+    import subprocess
+    if shutil.which("notify-send"):
+        subprocess.run(["notify-send", title, text], timeout=timeout)
+    elif shutil.which("osascript"):
+        subprocess.run(["osascript", "-e", f"display notification {json.dumps(text)} with title {json.dumps(title)}"],
+                       timeout=timeout)
+    else:
+        print(f"\a{title}: {text}", file=sys.stderr)
+
+
+class AlertDispatcher:
+    """监听TimerEngine的数值变化，倒计时越过阈值时把动作交给后台线程执行
+
+    notifier(标题, 内容) 可由界面提供（例如转到GUI线程显示托盘通知），必须立即返回。
+    local 为 load_local_alerts() 读取的用户配置，与目录中的提醒合并。
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_limit=QUEUE_LIMIT, notifier=None, local=None):
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_limit)
+        self.notifier = notifier
+        self.local = local or {}
+        self.alerts = {}  # 引擎id -> (机制名称, (AlertSpec, ...))
+        self.last = {}  # 引擎id -> 上一次的显示值
+        self.stats = {}  # 动作名称 -> HookStats
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def attach(self, engine):
+        self.engine = engine
+        engine.listeners.append(self.on_state)
+
+    def alerts_for(self, boss, spec):
+        """目录中的提醒加上用户配置中该机制的提醒"""
+        local = self.local.get(f"{boss}/{spec.name}")
+        if local is None:
+            local = self.local.get(spec.name, ())
+        return spec.alerts + local
+
+    def bind(self, alerts):
+        """alerts: {引擎id: (机制名称, (AlertSpec, ...))}，切换BOSS或目录更新后整体替换"""
+        self.alerts = {tid: entry for tid, entry in alerts.items() if entry[1]}
+        self.last = {tid: value for tid, value in self.last.items() if tid in self.alerts}
+
+    def on_state(self, event, tid, epoch):
+        if tid not in self.alerts:
+            return
+        if event == RUNNING:
+            value = self.engine.values[tid]
+            self.last[tid] = value + 1  # 启动时的第一个值也可以触发
+            self._check(tid, value)
+        else:
+            self.last.pop(tid, None)
+
+    def on_tick(self, changed):
+        alerts = self.alerts
+        for tid, value in changed:
+            if tid in alerts:
+                self._check(tid, value)
+
+    def _check(self, tid, value):
+        last = self.last.get(tid)
+        self.last[tid] = value
+        if last is None:
+            return
+        if value >= last:
+            last = value + 1  # 循环或时间线进入下一区间：与启动时相同，新区间的第一个值也可以触发
+        name, specs = self.alerts[tid]
+        for spec in specs:
+            if last > spec.at >= value:
+                self.submit(name, spec, value)
+
+    def submit(self, name, spec, value):
+        """放入队列后立即返回；队列已满时丢弃"""
+        key = f"{name}@{spec.at}:{spec.action}"
+        if len(self._threads) < self.workers:
+            self._start_worker()
+        try:
+            self.queue.put_nowait((key, name, spec, value, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self.stats.setdefault(key, HookStats()).dropped += 1
+
+    def _start_worker(self):
+        thread = threading.Thread(target=self._work, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _work(self):
+        import subprocess  # 只在第一次执行提醒时导入，不拖慢启动
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            key, name, spec, value, queued = item
+            begin = time.perf_counter()
+            failed = timed_out = False
+            try:
+                self.run(name, spec, value)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+            except Exception as e:
+                failed = True
+                timed_out = 'timed out' in str(e)
+                print(f"Error running alert {key}: {e}")
+            elapsed = (time.perf_counter() - begin) * 1000
+            with self._lock:
+                stats = self.stats.setdefault(key, HookStats())
+                stats.count += 1
+                stats.failures += failed
+                stats.timeouts += timed_out
+                stats.last_ms = elapsed
+                stats.total_ms += elapsed
+                stats.max_ms = max(stats.max_ms, elapsed)
+                stats.max_wait_ms = max(stats.max_wait_ms, (begin - queued) * 1000)
+
+    def run(self, name, spec, value):
+        """在后台线程中执行一个动作"""
+        if spec.action == "sound":
+            play_sound(spec.target, spec.timeout)
+        elif spec.action == "notify":
+            if self.notifier is not None:
+                self.notifier(name, spec.target)
+            else:
+                desktop_notify(name, spec.target, spec.timeout)
+        elif spec.action == "webhook":
+            import urllib.request
+            body = json.dumps({"mechanic": name, "threshold": spec.at, "value": value},
+                              ensure_ascii=False).encode('utf-8')
+            request = urllib.request.Request(spec.target, data=body,
+                                             headers={"Content-Type": "application/json; charset=utf-8"})
+            with urllib.request.urlopen(request, timeout=spec.timeout) as response:
+                response.read()
+        elif spec.action == "command":
+            import subprocess
+            env = dict(os.environ, PT_MECHANIC=name, PT_THRESHOLD=str(spec.at), PT_VALUE=str(value))
+            command = list(spec.target) if isinstance(spec.target, tuple) else spec.target
+            subprocess.run(command, shell=isinstance(command, str), env=env, timeout=spec.timeout,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def close(self):
+        for _ in self._threads:
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                break
+
+    def snapshot(self):
+        with self._lock:
+            return {key: stats.as_dict() for key, stats in self.stats.items()}
+
+    def report(self):
+        """调试面板显示用的文本：按最大耗时排序"""
+        stats = self.snapshot()
+        if not stats:
+            return "提醒：尚未执行"
+        lines = [f"提醒（队列 {self.queue.qsize()}/{self.queue.maxsize}，线程 {len(self._threads)}）："]
+        for key, item in sorted(stats.items(), key=lambda entry: -entry[1]['max_ms']):
+            average = item['total_ms'] / item['count'] if item['count'] else 0.0
+            lines.append(f"  {key}  次数 {item['count']}  平均 {average:.1f} ms  最大 {item['max_ms']:.1f} ms  "
+                         f"等待 {item['max_wait_ms']:.1f} ms  失败 {item['failures']}  超时 {item['timeouts']}  "
+                         f"丢弃 {item['dropped']}")
+        return "\n".join(lines)
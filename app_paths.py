@@ -0,0 +1,35 @@
+"""程序数据与资源文件的路径"""
+import os
+import sys
+
+APP_NAME = "PerfectTimer"
+
+
+def app_dir():
+    """程序所在目录：打包后为exe所在目录，源码运行时为脚本目录"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def resource_path(name):
+    """查找资源文件：优先exe旁边（便于用户修改），其次PyInstaller解包目录"""
+    candidates = [os.path.join(app_dir(), name)]
+    bundle_dir = getattr(sys, '_MEIPASS', None)
+    if bundle_dir:
+        candidates.append(os.path.join(bundle_dir, name))
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return candidates[-1]
+
+
+def data_dir(*parts):
+    """用户数据目录（缓存、日志等），不存在时自动创建"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    path = os.path.join(base, APP_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,47 @@
+"""控制接口延迟测试：交替发送START/RESET，统计从发出命令到界面已更新（收到回复）的延迟
+
+用法：
+    python control_bench.py [--port 47321] [--count 1000] [副本 BOSS 机制]
+"""
+import argparse
+import socket
+import time
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run(port, count, dungeon="", boss="", mechanic=""):
+    target = f"{dungeon}\t{boss}\t{mechanic}"
+    latencies = []
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile("r", encoding="utf-8")
+        for index in range(count):
+            command = "START" if index % 2 == 0 else "RESET"
+            begin = time.perf_counter()
+            sock.sendall(f"{command}\t{target}\n".encode("utf-8"))
+            reply = reader.readline()
+            latencies.append((time.perf_counter() - begin) * 1000)
+            if not reply.startswith("OK"):
+                raise RuntimeError(reply.strip())
+    return {
+        "count": count,
+        "p50_ms": percentile(latencies, 0.5),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": max(latencies),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="控制接口延迟测试")
+    parser.add_argument("--port", type=int, default=47321)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("target", nargs="*", help="副本 BOSS 机制（默认当前BOSS的全部机制）")
+    args = parser.parse_args()
+    result = run(args.port, args.count, *args.target[:3])
+    print(f"{result['count']}条命令: p50 {result['p50_ms']:.3f} ms, "
+          f"p99 {result['p99_ms']:.3f} ms, max {result['max_ms']:.3f} ms")
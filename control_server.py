@@ -0,0 +1,113 @@
+"""本地控制接口：外部工具（宏键盘、脚本、日志解析器）通过localhost TCP控制计时器
+
+协议为按行的文本，字段之间用制表符分隔，编码UTF-8：
+    START<TAB>副本<TAB>BOSS<TAB>机制
+    STOP<TAB>副本<TAB>BOSS<TAB>机制
+    RESET<TAB>副本<TAB>BOSS<TAB>机制
+    QUERY<TAB>副本<TAB>BOSS<TAB>机制
+    PING
+副本和BOSS留空表示当前选择，机制留空或为 * 表示当前BOSS的全部机制。
+START/STOP/RESET会切换到指定的BOSS；QUERY只读，不切换。
+每条命令回复一行：OK[<TAB>结果] 或 ERR<TAB>原因；超过MAX_LINE字节的行整行丢弃并回复ERR。
+"""
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QAbstractSocket, QHostAddress, QTcpServer
+
+DEFAULT_PORT = 47321
+COMMANDS = ("START", "STOP", "RESET", "QUERY", "PING")
+MAX_LINE = 4096
+
+
+class ControlCommand:
+    __slots__ = ('kind', 'dungeon', 'boss', 'mechanic')
+
+    def __init__(self, kind, dungeon="", boss="", mechanic=""):
+        self.kind = kind
+        self.dungeon = dungeon
+        self.boss = boss
+        self.mechanic = mechanic
+
+
+def parse_command(line):
+    """解析一行命令；格式错误时抛出ValueError"""
+    fields = line.rstrip("\r\n").split("\t")
+    kind = fields[0].strip().upper()
+    if kind not in COMMANDS:
+        raise ValueError(f"unknown command {fields[0]!r}")
+    fields = fields[1:] + [""] * (3 - len(fields[1:]))
+    if len(fields) > 3:
+        raise ValueError("too many fields")
+    mechanic = fields[2]
+    return ControlCommand(kind, fields[0], fields[1], "" if mechanic == "*" else mechanic)
+
+
+class ControlServer(QObject):
+    """监听localhost，在GUI线程中直接执行命令并回复"""
+
+    def __init__(self, handler, port=DEFAULT_PORT, parent=None):
+        super().__init__(parent)
+        self.handler = handler  # handler(ControlCommand) -> 回复字符串
+        self.port = port
+        self.server = QTcpServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+        self.clients = []
+        self.overlong = set()  # 正在丢弃超长行剩余部分的连接
+
+    def listen(self):
+        if not self.server.listen(QHostAddress.LocalHost, self.port):
+            print(f"Error starting control server: {self.server.errorString()}")
+            return False
+        self.port = self.server.serverPort()
+        return True
+
+    def close(self):
+        self.server.close()
+        for client in list(self.clients):
+            client.disconnectFromHost()
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            client = self.server.nextPendingConnection()
+            client.setSocketOption(QAbstractSocket.LowDelayOption, 1)
+            client.readyRead.connect(lambda client=client: self._on_ready_read(client))
+            client.disconnected.connect(lambda client=client: self._on_disconnected(client))
+            self.clients.append(client)
+
+    def _on_disconnected(self, client):
+        if client in self.clients:
+            self.clients.remove(client)
+        self.overlong.discard(client)
+        client.deleteLater()
+
+    def _on_ready_read(self, client):
+        replies = []
+        while client.canReadLine():
+            data = bytes(client.readLine(MAX_LINE))
+            complete = data.endswith(b"\n")
+            if client in self.overlong:
+                if complete:  # 超长行到此结束
+                    self.overlong.discard(client)
+            elif not complete:
+                # readLine只读出了超长行的前一部分，其余部分不能当作新的命令执行
+                self.overlong.add(client)
+                replies.append("ERR\tline too long")
+            else:
+                replies.append(self._execute(data.decode("utf-8", errors="replace")))
+        if not replies and client.bytesAvailable() > MAX_LINE:
+            client.disconnectFromHost()
+            return
+        if replies:
+            client.write("".join(reply + "\n" for reply in replies).encode("utf-8"))
+            client.flush()
+
+    def _execute(self, line):
+        try:
+            command = parse_command(line)
+        except ValueError as e:
+            return f"ERR\t{e}"
+        if command.kind == "PING":
+            return "OK"
+        try:
+            return self.handler(command)
+        except Exception as e:
+            return f"ERR\t{e}"
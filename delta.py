@@ -0,0 +1,182 @@
+"""二进制差分补丁：生成、选择补丁链、流式应用
+
+补丁格式：
+    b'PTD1' + 源文件大小(8字节) + 源文件SHA-256(32字节) + 目标文件大小(8字节)
+    之后是zlib压缩的操作流：
+        b'C' + 偏移(8字节) + 长度(4字节)   从源文件复制
+        b'I' + 长度(4字节) + 数据           插入新数据
+        b'E'                                结束
+
+用法（发布时生成补丁）：
+    python delta.py 旧版本.exe 新版本.exe 输出.patch
+"""
+import hashlib
+import heapq
+import os
+import struct
+import sys
+import zlib
+
+PATCH_MAGIC = b'PTD1'
+BLOCK_SIZE = 64
+COPY_CHUNK = 1024 * 1024
+_HEADER = struct.Struct('<Q32sQ')
+_COPY = struct.Struct('<QI')
+_LENGTH = struct.Struct('<I')
+
+
+class PatchError(Exception):
+    pass
+
+
+def make_delta(old, new, block_size=BLOCK_SIZE):
+    """生成从old到new的补丁字节串"""
+    index = {}
+    for offset in range(0, len(old) - block_size + 1, block_size):
+        index.setdefault(old[offset:offset + block_size], offset)
+
+    ops = []
+    literal_start = 0
+    position = 0
+    end = len(new) - block_size
+    while position <= end:
+        source = index.get(new[position:position + block_size])
+        if source is None:
+            position += 1
+            continue
+        # 向后扩展匹配
+        length = block_size
+        while (position + length < len(new) and source + length < len(old)
+               and new[position + length] == old[source + length]):
+            length += 1
+        if literal_start < position:
+            ops.append((b'I', new[literal_start:position]))
+        ops.append((b'C', source, length))
+        position += length
+        literal_start = position
+    if literal_start < len(new):
+        ops.append((b'I', new[literal_start:]))
+
+    compressor = zlib.compressobj(9)
+    body = []
+    for op in ops:
+        if op[0] == b'C':
+            body.append(compressor.compress(b'C' + _COPY.pack(op[1], op[2])))
+        else:
+            data = op[1]
+            body.append(compressor.compress(b'I' + _LENGTH.pack(len(data)) + data))
+    body.append(compressor.compress(b'E'))
+    body.append(compressor.flush())
+    header = PATCH_MAGIC + _HEADER.pack(len(old), hashlib.sha256(old).digest(), len(new))
+    return header + b''.join(body)
+
+
+class _PatchStream:
+    """边读边解压补丁操作流"""
+
+    def __init__(self, f):
+        self.f = f
+        self.decompressor = zlib.decompressobj()
+        self.buffer = bytearray()
+
+    def read(self, size):
+        while len(self.buffer) < size:
+            chunk = self.f.read(COPY_CHUNK)
+            if not chunk:
+                self.buffer += self.decompressor.flush()
+                if len(self.buffer) < size:
+                    raise PatchError("补丁数据不完整")
+                break
+            self.buffer += self.decompressor.decompress(chunk)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+            sha256.update(chunk)
+    return sha256.digest()
+
+
+def apply_patch(source_path, patch_path, output_path):
+    """把补丁应用到源文件，流式写出目标文件，返回(MD5, SHA-256)十六进制摘要"""
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    with open(patch_path, 'rb') as patch:
+        if patch.read(4) != PATCH_MAGIC:
+            raise PatchError("不是有效的补丁文件")
+        source_size, source_digest, target_size = _HEADER.unpack(patch.read(_HEADER.size))
+        if os.path.getsize(source_path) != source_size or file_sha256(source_path) != source_digest:
+            raise PatchError("补丁与当前程序版本不匹配")
+        stream = _PatchStream(patch)
+        written = 0
+        with open(source_path, 'rb') as source, open(output_path, 'wb') as output:
+            while True:
+                op = stream.read(1)
+                if op == b'E':
+                    break
+                if op == b'C':
+                    offset, length = _COPY.unpack(stream.read(_COPY.size))
+                    source.seek(offset)
+                    while length > 0:
+                        data = source.read(min(COPY_CHUNK, length))
+                        if not data:
+                            raise PatchError("补丁引用超出源文件范围")
+                        output.write(data)
+                        md5.update(data)
+                        sha256.update(data)
+                        written += len(data)
+                        length -= len(data)
+                elif op == b'I':
+                    length, = _LENGTH.unpack(stream.read(_LENGTH.size))
+                    data = stream.read(length)
+                    output.write(data)
+                    md5.update(data)
+                    sha256.update(data)
+                    written += len(data)
+                else:
+                    raise PatchError("未知的补丁操作")
+    if written != target_size:
+        raise PatchError("补丁输出大小不正确")
+    return md5.hexdigest(), sha256.hexdigest()
+
+
+def select_patch_chain(patches, current, target):
+    """在清单的补丁列表中选出从current到target下载总量最小的补丁链；没有可用链时返回None"""
+    edges = {}
+    for patch in patches:
+        edges.setdefault(patch['from'], []).append(patch)
+    queue = [(0, 0, current, [])]
+    best = {current: 0}
+    counter = 1
+    while queue:
+        size, _, version, chain = heapq.heappop(queue)
+        if version == target:
+            return chain
+        if size > best.get(version, size):
+            continue
+        for patch in edges.get(version, ()):
+            total = size + patch.get('size', 0)
+            if total < best.get(patch['to'], float('inf')):
+                best[patch['to']] = total
+                heapq.heappush(queue, (total, counter, patch['to'], chain + [patch]))
+                counter += 1
+    return None
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4:
+        print(__doc__)
+        sys.exit(1)
+    with open(sys.argv[1], 'rb') as f:
+        old_data = f.read()
+    with open(sys.argv[2], 'rb') as f:
+        new_data = f.read()
+    patch_data = make_delta(old_data, new_data)
+    with open(sys.argv[3], 'wb') as f:
+        f.write(patch_data)
+    print(f"补丁大小：{len(patch_data)} 字节")
+    print(f"SHA-256：{hashlib.sha256(patch_data).hexdigest()}")
@@ -0,0 +1,312 @@
+"""可续传的下载器：支持Range续传、可选分段并行下载，边下载边计算MD5和SHA-256
+
+未完成的下载保存为 .part 文件，并在 .part.json 中记录来源和ETag，程序重启后可继续。
+分段下载取消或出错时在 .part.json 中记录每一段还未下载的范围，下次只下载这些范围。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+REQUEST_TIMEOUT = 15
+MIN_BUFFER = 16 * 1024
+MAX_BUFFER = 1024 * 1024
+PROGRESS_INTERVAL = 0.1  # 进度回调的最小间隔（秒）
+MIN_SEGMENT_SIZE = 1024 * 1024  # 小于该大小的分段不值得并行
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+class RangeNotSupported(IOError):
+    pass
+
+
+class DownloadResult:
+    def __init__(self, path, size, md5, sha256):
+        self.path = path
+        self.size = size
+        self.md5 = md5
+        self.sha256 = sha256
+
+    def verify(self, md5=None, sha256=None):
+        """校验摘要；清单中未提供的摘要跳过，但至少要提供一个"""
+        if not (md5 or sha256):
+            return False
+        if md5 and md5.lower() != self.md5:
+            return False
+        if sha256 and sha256.lower() != self.sha256:
+            return False
+        return True
+
+
+class AdaptiveBuffer:
+    """根据每次读取耗时调整读取块大小：读得快就加倍，读得慢就减半"""
+
+    def __init__(self, size=64 * 1024, minimum=MIN_BUFFER, maximum=MAX_BUFFER):
+        self.size = size
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def record(self, length, elapsed):
+        if length >= self.size and elapsed < 0.05:
+            self.size = min(self.maximum, self.size * 2)
+        elif elapsed > 0.5:
+            self.size = max(self.minimum, self.size // 2)
+
+
+class _HashCursor:
+    """按文件顺序计算摘要；乱序到达的分段先登记，等前面的数据齐了再从磁盘读回"""
+
+    def __init__(self, path):
+        self.path = path
+        self.md5 = hashlib.md5()
+        self.sha256 = hashlib.sha256()
+        self.position = 0
+        self.pending = {}  # 起始位置 -> 结束位置
+        self.lock = threading.Lock()
+
+    def feed(self, start, data):
+        with self.lock:
+            if start == self.position:
+                self.md5.update(data)
+                self.sha256.update(data)
+                self.position += len(data)
+            else:
+                self.pending[start] = start + len(data)
+            self._catch_up()
+
+    def _catch_up(self):
+        while self.position in self.pending:
+            end = self.pending.pop(self.position)
+            self.hash_file_range(self.position, end)
+
+    def hash_file_range(self, start, end):
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                data = f.read(min(MAX_BUFFER, remaining))
+                if not data:
+                    break
+                self.md5.update(data)
+                self.sha256.update(data)
+                remaining -= len(data)
+        self.position = end
+
+
+class Downloader:
+    def __init__(self, url, dest_dir, filename=None, segments=1, progress=None, timeout=REQUEST_TIMEOUT):
+        self.url = url
+        self.dest_dir = dest_dir
+        self.filename = filename or os.path.basename(urllib.parse.unquote(urllib.parse.urlparse(url).path)) or 'download'
+        self.segments = max(1, segments)
+        self.progress = progress  # progress(已下载字节数, 总字节数或None)
+        self.timeout = timeout
+        self.downloaded = 0
+        self.total = None
+        self._last_progress = 0.0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    @property
+    def path(self):
+        return os.path.join(self.dest_dir, self.filename)
+
+    @property
+    def part_path(self):
+        return self.path + '.part'
+
+    @property
+    def meta_path(self):
+        return self.part_path + '.json'
+
+    def cancel(self):
+        """取消下载；已下载的部分保留，下次可继续"""
+        self._cancelled.set()
+
+    def run(self):
+        os.makedirs(self.dest_dir, exist_ok=True)
+        meta = self._load_meta()
+        if meta and meta.get('segments') and os.path.exists(self.part_path):
+            cursor = self._resume_segmented(meta)
+        else:
+            cursor = self._run_stream(meta)
+        if self.total is not None and self.downloaded != self.total:
+            raise IOError(f"下载不完整：{self.downloaded}/{self.total} 字节")
+        self._report(force=True)
+        os.replace(self.part_path, self.path)
+        self._remove_meta()
+        return DownloadResult(self.path, self.downloaded, cursor.md5.hexdigest(), cursor.sha256.hexdigest())
+
+    def _run_stream(self, meta):
+        """新下载或单连接续传；文件足够大且服务器支持Range时改为分段下载剩余部分"""
+        offset = os.path.getsize(self.part_path) if meta and os.path.exists(self.part_path) else 0
+        headers = {}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            if meta.get('etag'):
+                headers['If-Range'] = meta['etag']
+        response = self._open(headers)
+        with response:
+            resumed = response.status == 206
+            if not resumed:
+                offset = 0
+            length = response.headers.get('Content-Length')
+            self.total = offset + int(length) if length is not None else None
+            etag = response.headers.get('ETag')
+            self._save_meta({'url': self.url, 'etag': etag, 'total': self.total})
+            cursor = _HashCursor(self.part_path)
+            if offset:
+                # 续传时先补算已有部分的摘要（只需读一次本地文件）
+                cursor.hash_file_range(0, offset)
+            self.downloaded = offset
+            ranged = response.headers.get('Accept-Ranges', '').lower() == 'bytes' or resumed
+            remaining = self.total - offset if self.total is not None else None
+            if (self.segments > 1 and ranged and remaining is not None
+                    and remaining >= self.segments * MIN_SEGMENT_SIZE):
+                self._run_segmented(response, offset, cursor, etag)
+            else:
+                with open(self.part_path, 'r+b' if offset else 'wb') as f:
+                    f.seek(offset)
+                    self._stream(response, f, offset, None, cursor)
+        return cursor
+
+    def _run_segmented(self, response, offset, cursor, etag):
+        """第一段沿用已打开的连接，其余分段各自发起Range请求并行下载"""
+        with open(self.part_path, 'r+b' if offset else 'wb') as f:
+            f.truncate(self.total)
+        size = (self.total - offset) // self.segments
+        bounds = []
+        start = offset
+        for index in range(self.segments):
+            end = self.total if index == self.segments - 1 else start + size
+            bounds.append((start, end))
+            start = end
+        self._fetch_segments(bounds, cursor, etag, response)
+
+    def _resume_segmented(self, meta):
+        """按 .part.json 中记录的未完成范围继续分段下载；已下载的范围直接从磁盘补算摘要"""
+        self.total = meta['total']
+        etag = meta.get('etag')
+        bounds = sorted(tuple(bound) for bound in meta['segments'])
+        cursor = _HashCursor(self.part_path)
+        start = 0
+        for begin, end in bounds + [(self.total, self.total)]:
+            if begin > start:
+                cursor.pending[start] = begin
+            start = end
+        with cursor.lock:
+            cursor._catch_up()
+        self.downloaded = self.total - sum(end - begin for begin, end in bounds)
+        self._fetch_segments(bounds, cursor, etag)
+        return cursor
+
+    def _fetch_segments(self, bounds, cursor, etag, first_response=None):
+        """并行下载各范围；first_response为已打开的、从第一个范围开始的连接"""
+        positions = [start for start, _ in bounds]
+        errors = []
+
+        def fetch(index, source=None):
+            start, end = bounds[index]
+            try:
+                if source is None:
+                    headers = {'Range': f'bytes={start}-{end - 1}'}
+                    if etag:
+                        headers['If-Range'] = etag
+                    source = self._open(headers)
+                    if source.status != 206:
+                        source.close()
+                        raise RangeNotSupported("服务器不支持分段下载")
+                with source, open(self.part_path, 'r+b') as f:
+                    f.seek(start)
+                    self._stream(source, f, start, end, cursor,
+                                 mark=lambda position: positions.__setitem__(index, position))
+            except Exception as e:
+                errors.append(e)
+                self.cancel()
+
+        self._save_meta({'url': self.url, 'etag': etag, 'total': self.total, 'segments': bounds})
+        threads = [threading.Thread(target=fetch, args=(index,), daemon=True) for index in range(1, len(bounds))]
+        for thread in threads:
+            thread.start()
+        fetch(0, first_response)
+        for thread in threads:
+            thread.join()
+        if errors:
+            if any(isinstance(e, RangeNotSupported) for e in errors):
+                self._discard_partial()
+            else:
+                # 保留已下载的数据，只记录每一段剩余的范围
+                remaining = [(position, end) for position, (_, end) in zip(positions, bounds) if position < end]
+                self._save_meta({'url': self.url, 'etag': etag, 'total': self.total, 'segments': remaining})
+            raise errors[0]
+
+    def _stream(self, source, f, position, end, cursor, mark=None):
+        buffer = AdaptiveBuffer()
+        while end is None or position < end:
+            if self._cancelled.is_set():
+                raise DownloadCancelled()
+            size = buffer.size if end is None else min(buffer.size, end - position)
+            begin = time.monotonic()
+            data = source.read(size)
+            buffer.record(len(data), time.monotonic() - begin)
+            if not data:
+                break
+            f.write(data)
+            f.flush()
+            cursor.feed(position, data)
+            position += len(data)
+            if mark is not None:
+                mark(position)
+            with self._lock:
+                self.downloaded += len(data)
+            self._report()
+
+    def _report(self, force=False):
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_progress < PROGRESS_INTERVAL:
+                return
+            self._last_progress = now
+            downloaded = self.downloaded
+        self.progress(downloaded, self.total)
+
+    def _open(self, headers):
+        request = urllib.request.Request(self.url, headers=headers)
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 416:
+                # 本地部分已失效（例如文件在服务器上变短），重新开始
+                self._discard_partial()
+                return urllib.request.urlopen(urllib.request.Request(self.url), timeout=self.timeout)
+            raise
+
+    def _load_meta(self):
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('url') == self.url else None
+
+    def _save_meta(self, meta):
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    def _remove_meta(self):
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+
+    def _discard_partial(self):
+        self._remove_meta()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
@@ -0,0 +1,287 @@
+"""界面热点基准测试：在无界面的offscreen Qt下测量主窗口各热点路径的耗时
+
+测量项目：
+    update_timers   切换BOSS时重建计时器列表的耗时（按机制数量）
+    tick            N个运行中的计时器每次推进（update_time -> update_display）的耗时
+    float_window    悬浮窗创建+显示+关闭销毁的耗时
+    load_timers     合成目录（今天规模的10x~1000x）的JSON解析编译耗时和缓存命中耗时
+    first_frame     新进程从启动到主窗口首帧绘制的耗时
+
+结果以JSON保存为基线，之后与基线比较即可用数字发现性能退化：
+    python gui_bench.py --save gui_bench.json
+    python gui_bench.py --compare gui_bench.json [--tolerance 0.25]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# 目录缓存和会话日志写到临时目录，不影响真实的用户数据（data_dir在Windows上使用LOCALAPPDATA）
+BENCH_DATA = os.environ.get("GUI_BENCH_DATA") or tempfile.mkdtemp(prefix="gui_bench_")
+os.environ["XDG_CACHE_HOME"] = BENCH_DATA
+os.environ["LOCALAPPDATA"] = BENCH_DATA
+
+MECHANIC_COUNTS = (5, 20, 50, 200, 1000)
+TICK_COUNTS = (20, 50, 200)
+FLOAT_COUNTS = (1, 10, 50)
+CATALOG_SCALES = (10, 100, 1000)
+DEFAULT_TOLERANCE = 0.25
+
+
+class VirtualClock:
+    """可注入TimerEngine的虚拟单调时钟，由测试手动推进"""
+
+    def __init__(self, now=1000.0):
+        self.start = now
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds=1.0):
+        self.now += seconds
+        return self.now
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def measure(func, repeat):
+    """重复执行func，返回每次耗时（毫秒）的中位数和最小值"""
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - begin) * 1000)
+    return {"median_ms": median(samples), "min_ms": min(samples), "repeat": repeat}
+
+
+def make_catalog(scale=1, bosses_with=()):
+    """以随程序发布的timers.json为模板生成scale倍大小的目录；
+    bosses_with中的每个数量另外生成一个有对应机制数的BOSS，放在"基准"副本下"""
+    from app_paths import resource_path
+    with open(resource_path('timers.json'), 'r', encoding='utf-8') as f:
+        template = json.load(f)
+    catalog = {}
+    for copy in range(scale):
+        for dungeon, bosses in template.items():
+            catalog[f"{dungeon}#{copy}" if copy else dungeon] = bosses
+    if bosses_with:
+        catalog["基准"] = {
+            f"{count}个机制": [{"name": f"机制{i}", "time": 5 + i % 60, "description": "基准测试"}
+                              for i in range(count)]
+            for count in bosses_with
+        }
+    return catalog
+
+
+def write_catalog(catalog, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False)
+    return path
+
+
+def process_events(app):
+    from PyQt5.QtCore import QCoreApplication, QEvent
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    app.processEvents()
+
+
+def make_window(app, clock=None, bosses_with=None, **options):
+    """创建主窗口并加载"基准"副本；不显示更新检查等启动后的后台任务"""
+    from main import MainWindow
+    if bosses_with is None:
+        bosses_with = sorted(set(MECHANIC_COUNTS + TICK_COUNTS))
+    catalog = make_catalog(bosses_with=bosses_with)
+    path = write_catalog(catalog, os.path.join(BENCH_DATA, 'bench_timers.json'))
+    window = MainWindow(catalog_path=path, **options)
+    if clock is not None:
+        window.scheduler.engine.clock = clock
+    window.first_painted = True  # 跳过首帧后的延迟启动流程
+    window.show()
+    window.load_timers()
+    window.level1_combo.setCurrentText("基准")
+    process_events(app)
+    return window
+
+
+def select_boss(app, window, boss):
+    window.level2_combo.blockSignals(True)
+    window.level2_combo.setCurrentText(boss)
+    window.level2_combo.blockSignals(False)
+    window.update_timers()
+    process_events(app)
+
+
+def bench_update_timers(app, repeat):
+    window = make_window(app)
+    results = {}
+    for count in MECHANIC_COUNTS:
+        boss = f"{count}个机制"
+        other = f"{MECHANIC_COUNTS[0]}个机制"
+        select_boss(app, window, boss)
+
+        def switch():
+            select_boss(app, window, other)
+            select_boss(app, window, boss)
+        results[f"update_timers[{count}]"] = measure(switch, repeat)
+    window.close()
+    window.deleteLater()
+    process_events(app)
+    return results
+
+
+def bench_tick(app, repeat, ticks=60):
+    clock = VirtualClock()
+    window = make_window(app, clock=clock)
+    engine = window.scheduler.engine
+    results = {}
+    for count in TICK_COUNTS:
+        select_boss(app, window, f"{count}个机制")
+        window.start_all_timers()
+
+        def run_ticks():
+            for _ in range(ticks):
+                engine.tick(clock.advance())
+        result = measure(run_ticks, repeat)
+        result["per_tick_ms"] = result["median_ms"] / ticks
+        results[f"tick[{count}]"] = result
+        window.reset_all_timers()
+    window.close()
+    window.deleteLater()
+    process_events(app)
+    return results
+
+
+def bench_float_window(app, repeat):
+    from main import FloatWindow
+    results = {}
+    for count in FLOAT_COUNTS:
+        def cycle():
+            windows = [FloatWindow(f"机制{i}", 30) for i in range(count)]
+            for window in windows:
+                window.show()
+            process_events(app)
+            for window in windows:
+                window.close()
+                window.deleteLater()
+            process_events(app)
+        results[f"float_window[{count}]"] = measure(cycle, repeat)
+    return results
+
+
+def bench_load_timers(repeat):
+    from timer_catalog import TimerCatalog
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="gui_bench_catalog_")
+    for scale in CATALOG_SCALES:
+        path = write_catalog(make_catalog(scale), os.path.join(work_dir, f"timers_{scale}x.json"))
+        catalog = TimerCatalog(path, cache_dir=work_dir)
+        compiled = measure(catalog.compile, repeat)
+        compiled["bytes"] = os.path.getsize(path)
+        results[f"load_timers.compile[{scale}x]"] = compiled
+        results[f"load_timers.cached[{scale}x]"] = measure(lambda: TimerCatalog(path, cache_dir=work_dir).load(),
+                                                           repeat)
+    return results
+
+
+def first_frame_child():
+    """在子进程中运行：从解释器启动（含导入）到主窗口首帧绘制，输出毫秒数"""
+    begin = time.perf_counter()
+    from PyQt5.QtWidgets import QApplication
+    import main
+    app = QApplication(sys.argv[:1])
+    window = main.MainWindow()
+    window.finish_startup = lambda: None  # 只测到首帧，不加载目录
+    window.show()
+    while not window.first_painted:
+        app.processEvents()
+    print(json.dumps({"ms": (time.perf_counter() - begin) * 1000}))
+
+
+def bench_first_frame(repeat):
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--first-frame-child"],
+                                capture_output=True, text=True, check=True).stdout
+        total = (time.perf_counter() - begin) * 1000
+        samples.append((json.loads(output.strip().splitlines()[-1])["ms"], total))
+    return {
+        "first_frame": {"median_ms": median([s[0] for s in samples]), "min_ms": min(s[0] for s in samples),
+                        "repeat": repeat},
+        "first_frame.process": {"median_ms": median([s[1] for s in samples]),
+                                "min_ms": min(s[1] for s in samples), "repeat": repeat},
+    }
+
+
+def run(repeat=5, only=None):
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    suites = {
+        "update_timers": lambda: bench_update_timers(app, repeat),
+        "tick": lambda: bench_tick(app, repeat),
+        "float_window": lambda: bench_float_window(app, repeat),
+        "load_timers": lambda: bench_load_timers(repeat),
+        "first_frame": lambda: bench_first_frame(repeat),
+    }
+    results = {}
+    for name, suite in suites.items():
+        if only and name not in only:
+            continue
+        results.update(suite())
+    return {
+        "version": 1,
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "qpa": os.environ.get("QT_QPA_PLATFORM"),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """返回[(名称, 基线毫秒, 当前毫秒, 变化比例)]，只包含超出容差的退化项"""
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = result["median_ms"] / base["median_ms"] - 1
+        if ratio > tolerance:
+            regressions.append((name, base["median_ms"], result["median_ms"], ratio))
+    return regressions
+
+
+if __name__ == '__main__':
+    if "--first-frame-child" in sys.argv:
+        first_frame_child()
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description="界面热点基准测试（offscreen Qt）")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="只运行指定项目：update_timers tick float_window load_timers first_frame")
+    parser.add_argument("--save", metavar="PATH", help="把结果保存为基线JSON")
+    parser.add_argument("--compare", metavar="PATH", help="与基线JSON比较，有退化时返回非零")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许的相对变慢比例")
+    args = parser.parse_args()
+    report = run(args.repeat, args.only)
+    for name, result in report["results"].items():
+        print(f"{name:36s} {result['median_ms']:10.3f} ms (min {result['min_ms']:.3f})")
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for name, before, after, ratio in regressions:
+            print(f"退化: {name} {before:.3f} ms -> {after:.3f} ms (+{ratio:.0%})")
+        sys.exit(1 if regressions else 0)
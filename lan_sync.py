@@ -0,0 +1,340 @@
+"""局域网同步：一个实例作为主控，把副本选择和计时器启动/停止广播给其他实例
+
+使用UDP组播（默认 239.255.47.32:47322，TTL为1，只在本网段），同一台机器上的多个实例也能互相收到。
+报文为紧凑的二进制格式，只携带变化：
+    头部：b'PS' + 版本(1) + 类型(1) + 会话id(4) + 序号(4)
+    SELECT    BOSS机制名称的CRC32(4) + 副本名 + BOSS名（均为2字节长度 + UTF-8）
+    START     主控单调时钟起点(8) + 数量(2) + 机制序号(2)*数量；同时启动的一组只发一条
+    STOP      数量(2) + 机制序号(2)*数量
+    HEARTBEAT 无内容，只用头部序号让跟随者发现丢包
+    SNAPSHOT  SELECT的内容 + 数量(2) + (机制序号(2) + 起点(8))*数量，回复HELLO
+    HELLO / SYNC_REQ / SYNC_RESP  跟随者单播给主控：请求快照 / 估计时钟偏差
+机制用当前BOSS下的序号表示，SELECT中的CRC32用于确认双方目录一致。
+
+时钟偏差按NTP的方法估计：跟随者记录发送时刻t0和收到回复时刻t3，主控回复它的时刻t1，
+偏差 = t1 - (t0 + t3) / 2；保留最近几次中往返时间最短的一次。
+"""
+import random
+import struct
+import time
+import zlib
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtNetwork import QAbstractSocket, QHostAddress, QUdpSocket
+
+LEADER = "leader"
+FOLLOWER = "follower"
+DEFAULT_GROUP = "239.255.47.32"
+DEFAULT_PORT = 47322
+
+PROTOCOL_VERSION = 1
+SELECT, START, STOP, HEARTBEAT, SNAPSHOT, HELLO, SYNC_REQ, SYNC_RESP = range(1, 9)
+HEARTBEAT_INTERVAL = 2000
+SYNC_INTERVAL = 5000
+SYNC_FAST_INTERVAL = 200  # 刚加入时先快速采样几次
+SYNC_FAST_SAMPLES = 5
+SYNC_SAMPLES = 8
+
+_HEADER = struct.Struct('<2sBBII')
+_MAGIC = b'PS'
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_EPOCH = struct.Struct('<d')
+_SYNC = struct.Struct('<dd')
+_RUNNING = struct.Struct('<Hd')
+
+
+def names_crc(names):
+    return zlib.crc32("\n".join(names).encode('utf-8'))
+
+
+def _pack_text(text):
+    data = text.encode('utf-8')
+    return _U16.pack(len(data)) + data
+
+
+def _unpack_text(data, offset):
+    length, = _U16.unpack_from(data, offset)
+    offset += _U16.size
+    return data[offset:offset + length].decode('utf-8'), offset + length
+
+
+def _pack_indices(indices):
+    return _U16.pack(len(indices)) + struct.pack(f'<{len(indices)}H', *indices)
+
+
+def _unpack_indices(data, offset):
+    count, = _U16.unpack_from(data, offset)
+    offset += _U16.size
+    return list(struct.unpack_from(f'<{count}H', data, offset)), offset + count * 2
+
+
+def encode(kind, session, seq, **fields):
+    """编码一条报文，fields按类型取 dungeon/boss/crc/epoch/indices/running/t0/t1"""
+    body = b''
+    if kind in (SELECT, SNAPSHOT):
+        body = _U32.pack(fields['crc']) + _pack_text(fields['dungeon']) + _pack_text(fields['boss'])
+        if kind == SNAPSHOT:
+            running = fields['running']
+            body += _U16.pack(len(running)) + b''.join(_RUNNING.pack(index, epoch) for index, epoch in running)
+    elif kind == START:
+        body = _EPOCH.pack(fields['epoch']) + _pack_indices(fields['indices'])
+    elif kind == STOP:
+        body = _pack_indices(fields['indices'])
+    elif kind in (SYNC_REQ, SYNC_RESP):
+        body = _SYNC.pack(fields['t0'], fields.get('t1', 0.0))
+    return _HEADER.pack(_MAGIC, PROTOCOL_VERSION, kind, session, seq) + body
+
+
+def decode(data):
+    """解码报文，返回(类型, 会话id, 序号, 字段dict)；格式错误时抛出ValueError"""
+    try:
+        magic, version, kind, session, seq = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != PROTOCOL_VERSION:
+            raise ValueError("not a sync message")
+        offset = _HEADER.size
+        fields = {}
+        if kind in (SELECT, SNAPSHOT):
+            fields['crc'], = _U32.unpack_from(data, offset)
+            fields['dungeon'], offset = _unpack_text(data, offset + _U32.size)
+            fields['boss'], offset = _unpack_text(data, offset)
+            if kind == SNAPSHOT:
+                count, = _U16.unpack_from(data, offset)
+                offset += _U16.size
+                fields['running'] = [_RUNNING.unpack_from(data, offset + i * _RUNNING.size) for i in range(count)]
+        elif kind == START:
+            fields['epoch'], = _EPOCH.unpack_from(data, offset)
+            fields['indices'], _ = _unpack_indices(data, offset + _EPOCH.size)
+        elif kind == STOP:
+            fields['indices'], _ = _unpack_indices(data, offset)
+        elif kind in (SYNC_REQ, SYNC_RESP):
+            fields['t0'], fields['t1'] = _SYNC.unpack_from(data, offset)
+        elif kind not in (HEARTBEAT, HELLO):
+            raise ValueError(f"unknown message type {kind}")
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+    return kind, session, seq, fields
+
+
+class ClockOffset:
+    """主控时钟 - 本机时钟 的估计值"""
+
+    def __init__(self, samples=SYNC_SAMPLES):
+        self.samples = []
+        self.limit = samples
+
+    def add(self, t0, t1, t3):
+        self.samples.append((t3 - t0, t1 - (t0 + t3) / 2))
+        del self.samples[:-self.limit]
+
+    @property
+    def ready(self):
+        return bool(self.samples)
+
+    @property
+    def offset(self):
+        return min(self.samples)[1] if self.samples else 0.0
+
+    @property
+    def rtt(self):
+        return min(self.samples)[0] if self.samples else None
+
+
+class LanSync(QObject):
+    """主控：监听本机计时器变化并广播；跟随者：把收到的事件换算到本机时钟后应用
+
+    handler需要提供：
+        sync_state()                    -> (副本, BOSS, [机制名称], [(序号, 本机起点)])
+        apply_sync_select(副本, BOSS, crc) -> 目录一致时返回True
+        apply_sync_snapshot([(序号, 本机起点)])  只运行列出的机制
+        apply_sync_start(序号列表, 本机起点)
+        apply_sync_stop(序号列表)
+    """
+
+    def __init__(self, handler, role, clock=time.monotonic, group=DEFAULT_GROUP, port=DEFAULT_PORT, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.role = role
+        self.clock = clock
+        self.group = QHostAddress(group)
+        self.port = port
+        self.session = random.getrandbits(32)
+        self.seq = 0
+        self.offset = ClockOffset()
+        self.leader = None  # 跟随者记录的 (地址, 端口, 会话id)
+        self.last_seq = None
+        self.catalog_matches = False
+        self._pending_starts = {}  # 起点 -> [序号]
+        self._pending_stops = []
+        self._flush_scheduled = False
+        # 单播收发用独立端口，组播接收用共享端口，多个实例可以在同一台机器上运行
+        self.socket = QUdpSocket(self)
+        self.socket.readyRead.connect(lambda: self._on_ready_read(self.socket))
+        self.group_socket = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._on_timer)
+
+    @property
+    def is_leader(self):
+        return self.role == LEADER
+
+    def start(self):
+        if not self.socket.bind(QHostAddress.AnyIPv4, 0):
+            print(f"Error starting LAN sync: {self.socket.errorString()}")
+            return False
+        self.socket.setSocketOption(QAbstractSocket.MulticastTtlOption, 1)
+        self.socket.setSocketOption(QAbstractSocket.MulticastLoopbackOption, 1)
+        if self.is_leader:
+            self.timer.start(HEARTBEAT_INTERVAL)
+            return True
+        self.group_socket = QUdpSocket(self)
+        if not self.group_socket.bind(QHostAddress.AnyIPv4, self.port,
+                                      QUdpSocket.ShareAddress | QUdpSocket.ReuseAddressHint):
+            print(f"Error starting LAN sync: {self.group_socket.errorString()}")
+            return False
+        if not self.group_socket.joinMulticastGroup(self.group):
+            print(f"Error joining sync group: {self.group_socket.errorString()}")
+            return False
+        self.group_socket.readyRead.connect(lambda: self._on_ready_read(self.group_socket))
+        self.timer.start(SYNC_FAST_INTERVAL)
+        return True
+
+    def close(self):
+        self.timer.stop()
+        if self.group_socket is not None:
+            self.group_socket.leaveMulticastGroup(self.group)
+            self.group_socket.close()
+        self.socket.close()
+
+    # 主控
+
+    def broadcast_select(self, dungeon, boss, names):
+        if not self.is_leader:
+            return
+        self._flush()
+        self._send_group(SELECT, dungeon=dungeon, boss=boss, crc=names_crc(names))
+
+    def timer_started(self, index, epoch):
+        """同一轮事件循环中起点相同的启动合并为一条START"""
+        if self.is_leader:
+            self._pending_starts.setdefault(epoch, []).append(index)
+            self._schedule_flush()
+
+    def timer_stopped(self, index):
+        if self.is_leader:
+            self._pending_stops.append(index)
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        if self._pending_stops:
+            self._send_group(STOP, indices=self._pending_stops)
+            self._pending_stops = []
+        for epoch, indices in self._pending_starts.items():
+            self._send_group(START, epoch=epoch, indices=indices)
+        self._pending_starts = {}
+
+    def _send_group(self, kind, **fields):
+        self.seq += 1
+        self.socket.writeDatagram(encode(kind, self.session, self.seq, **fields), self.group, self.port)
+
+    def _send_snapshot(self, address, port):
+        self._flush()
+        dungeon, boss, names, running = self.handler.sync_state()
+        data = encode(SNAPSHOT, self.session, self.seq, dungeon=dungeon, boss=boss, crc=names_crc(names),
+                      running=running)
+        self.socket.writeDatagram(data, address, port)
+
+    # 跟随者
+
+    def _request(self, kind, **fields):
+        if self.leader is not None:
+            address, port, session = self.leader
+            self.socket.writeDatagram(encode(kind, session, 0, **fields), address, port)
+
+    def _on_timer(self):
+        if self.is_leader:
+            self._flush()
+            self.socket.writeDatagram(encode(HEARTBEAT, self.session, self.seq), self.group, self.port)
+            return
+        self._request(SYNC_REQ, t0=self.clock())
+        if len(self.offset.samples) >= SYNC_FAST_SAMPLES and self.timer.interval() != SYNC_INTERVAL:
+            self.timer.start(SYNC_INTERVAL)
+
+    def to_local(self, epoch):
+        """主控时钟的起点换算为本机时钟"""
+        return epoch - self.offset.offset
+
+    def to_leader(self, epoch):
+        return epoch + self.offset.offset
+
+    def _on_ready_read(self, socket):
+        while socket.hasPendingDatagrams():
+            data, address, port = socket.readDatagram(socket.pendingDatagramSize())
+            try:
+                kind, session, seq, fields = decode(data)
+            except ValueError:
+                continue
+            if self.is_leader:
+                if session != self.session:
+                    continue
+                if kind == SYNC_REQ:
+                    self.socket.writeDatagram(encode(SYNC_RESP, self.session, self.seq, t0=fields['t0'],
+                                                     t1=self.clock()), address, port)
+                elif kind == HELLO:
+                    self._send_snapshot(address, port)
+            else:
+                self._on_follower_message(kind, session, seq, fields, address, port)
+
+    def _on_follower_message(self, kind, session, seq, fields, address, port):
+        if kind in (HELLO, SYNC_REQ):
+            return
+        if kind == SYNC_RESP:
+            if self.leader is None or session != self.leader[2]:
+                return
+            first = not self.offset.ready
+            self.offset.add(fields['t0'], fields['t1'], self.clock())
+            if first:
+                self._request(HELLO)
+            return
+        if self.leader is None or self.leader[2] != session:
+            # 新的主控（或主控重启）：重新估计时钟偏差，再请求快照
+            self.leader = (QHostAddress(address), port, session)
+            self.offset = ClockOffset()
+            self.last_seq = None
+            self.timer.start(SYNC_FAST_INTERVAL)
+            self._request(SYNC_REQ, t0=self.clock())
+            return
+        if not self.offset.ready:
+            return
+        if kind == SNAPSHOT:
+            self.last_seq = seq
+            self.catalog_matches = self.handler.apply_sync_select(fields['dungeon'], fields['boss'], fields['crc'])
+            if self.catalog_matches:
+                running = [(index, self.to_local(epoch)) for index, epoch in fields['running']]
+                self.handler.apply_sync_snapshot(running)
+            return
+        if self.last_seq is None:
+            return  # 等待快照
+        if kind == HEARTBEAT:
+            if seq != self.last_seq:
+                self._request(HELLO)  # 丢失了最后的若干条
+            return
+        if seq != self.last_seq + 1:
+            self.last_seq = None
+            self._request(HELLO)
+            return
+        self.last_seq = seq
+        if kind == SELECT:
+            self.catalog_matches = self.handler.apply_sync_select(fields['dungeon'], fields['boss'], fields['crc'])
+        elif not self.catalog_matches:
+            return
+        elif kind == START:
+            self.handler.apply_sync_start(fields['indices'], self.to_local(fields['epoch']))
+        elif kind == STOP:
+            self.handler.apply_sync_stop(fields['indices'])
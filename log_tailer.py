@@ -0,0 +1,210 @@
+"""战斗日志跟踪：增量读取不断增长的日志文件，用多模式自动机一次扫描匹配全部触发短语
+
+只从上次的偏移继续读取，不重复读文件；匹配到的触发按日志中的时间戳而不是处理时间计时。
+"""
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+POLL_INTERVAL = 0.1
+READ_CHUNK = 1024 * 1024
+# 行首时间戳：[2024-03-21 20:15:03] / 2024-03-21 20:15:03.250 / [20:15:03]
+TIMESTAMP_PATTERN = re.compile(
+    r'^\[?(?:(?P<date>\d{4}[-/]\d{2}[-/]\d{2})[ T])?(?P<time>\d{2}:\d{2}:\d{2}(?:\.\d+)?)\]?')
+
+
+class TriggerAutomaton:
+    """Aho-Corasick自动机：一次扫描找出文本中出现的全部短语"""
+
+    def __init__(self, phrases=()):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        self.built = False
+        for phrase, value in phrases:
+            self.add(phrase, value)
+
+    def add(self, phrase, value):
+        if not phrase:
+            return
+        state = 0
+        for ch in phrase:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = nxt
+        self.outputs[state].append(value)
+        self.built = False
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.outputs[nxt] = self.outputs[nxt] + self.outputs[self.fail[nxt]]
+        self.built = True
+
+    def search(self, text):
+        """返回文本中出现的全部短语对应的值（按出现顺序，可重复）"""
+        if not self.built:
+            self.build()
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        state = 0
+        found = []
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                found.extend(outputs[state])
+        return found
+
+
+def parse_timestamp(line, now=None):
+    """解析行首时间戳为墙上时钟秒数；只有时分秒时取最近的、不晚于now的那一天"""
+    match = TIMESTAMP_PATTERN.match(line)
+    if not match:
+        return None
+    now = time.time() if now is None else now
+    clock = match.group('time')
+    if match.group('date'):
+        date = match.group('date').replace('/', '-')
+        fmt = '%Y-%m-%d %H:%M:%S.%f' if '.' in clock else '%Y-%m-%d %H:%M:%S'
+        try:
+            return datetime.strptime(f'{date} {clock}', fmt).timestamp()
+        except ValueError:
+            return None
+    today = datetime.fromtimestamp(now)
+    fmt = '%H:%M:%S.%f' if '.' in clock else '%H:%M:%S'
+    try:
+        parsed = datetime.strptime(clock, fmt)
+    except ValueError:
+        return None
+    stamp = today.replace(hour=parsed.hour, minute=parsed.minute, second=parsed.second,
+                          microsecond=parsed.microsecond).timestamp()
+    if stamp > now + 60:  # 跨过午夜：时间戳属于前一天
+        stamp -= 86400
+    return stamp
+
+
+class LogTailer:
+    """在后台线程增量读取日志，每个匹配调用 on_trigger(值, 日志墙上时间)"""
+
+    def __init__(self, path, automaton, on_trigger, encoding='utf-8', from_end=True,
+                 poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.automaton = automaton
+        self.on_trigger = on_trigger
+        self.encoding = encoding
+        self.from_end = from_end
+        self.poll_interval = poll_interval
+        self.offset = None
+        self.partial = b''
+        self.bytes_read = 0
+        self.lines_scanned = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except OSError:
+                pass  # 日志暂时不存在或被占用，下次再试
+            self._stop.wait(self.poll_interval)
+
+    def poll(self):
+        """读取自上次以来新增的内容并处理完整的行，返回处理的行数"""
+        size = os.path.getsize(self.path)
+        if self.offset is None:
+            self.offset = size if self.from_end else 0
+        if size < self.offset:
+            # 日志被截断或轮换，从头开始
+            self.offset = 0
+            self.partial = b''
+        if size == self.offset:
+            return 0
+        count = 0
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                chunk = f.read(READ_CHUNK)
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                self.bytes_read += len(chunk)
+                data = self.partial + chunk
+                lines = data.split(b'\n')
+                self.partial = lines.pop()
+                for raw in lines:
+                    self.process_line(raw.decode(self.encoding, errors='replace'))
+                count += len(lines)
+        return count
+
+    def process_line(self, line):
+        self.lines_scanned += 1
+        matches = self.automaton.search(line)
+        if not matches:
+            return
+        stamp = parse_timestamp(line)
+        if stamp is None:
+            stamp = time.time()
+        for value in matches:
+            self.on_trigger(value, stamp)
+
+
+def benchmark(megabytes=8, phrases=200):
+    """用合成日志测量吞吐量：返回每秒处理的MB数"""
+    import tempfile
+    automaton = TriggerAutomaton((f'技能{i}开始施放', i) for i in range(phrases))
+    filler = '[2024-03-21 20:15:03] 玩家甲 对 怒目 造成了 12345 点伤害\n'
+    hit = '[2024-03-21 20:15:04] 怒目 技能17开始施放\n'
+    fd, path = tempfile.mkstemp(suffix='.log')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        written = 0
+        index = 0
+        while written < megabytes * 1024 * 1024:
+            line = hit if index % 100 == 0 else filler
+            f.write(line)
+            written += len(line.encode('utf-8'))
+            index += 1
+    hits = []
+    tailer = LogTailer(path, automaton, lambda value, stamp: hits.append(value), from_end=False)
+    begin = time.perf_counter()
+    tailer.poll()
+    elapsed = time.perf_counter() - begin
+    os.remove(path)
+    return {'megabytes': tailer.bytes_read / 1024 / 1024, 'seconds': elapsed, 'matches': len(hits),
+            'mb_per_second': tailer.bytes_read / 1024 / 1024 / elapsed if elapsed else float('inf')}
+
+
+if __name__ == '__main__':
+    result = benchmark()
+    print(f"{result['megabytes']:.1f} MB, {result['matches']} 次匹配: {result['seconds']:.3f}s, "
+          f"{result['mb_per_second']:.1f} MB/s")
@@ -1,65 +1,284 @@
 import sys
-import json
 import os
+import math
 import time
-import threading
-import hashlib
-import tempfile
-import urllib.request
-from datetime import datetime, timedelta
+from collections import OrderedDict, deque
+
+_STARTUP_BEGIN = time.perf_counter()
+
+if __name__ == '__main__' and ('--tui' in sys.argv or '--headless' in sys.argv):
+    # 终端模式不导入Qt
+    import tui
+    sys.exit(tui.main(sys.argv[1:]))
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QComboBox, QLabel, QPushButton, 
                             QCheckBox, QFrame, QScrollArea, QMessageBox,
-                            QProgressDialog)
-from PyQt5.QtCore import Qt, QTimer, QPoint, QUrl
-from PyQt5.QtGui import QFont, QDesktopServices
+                            QProgressDialog, QListView, QStyledItemDelegate, QShortcut, QStyle,
+                            QStyleOption, QSystemTrayIcon)
+from PyQt5.QtCore import (Qt, QTimer, QPoint, QUrl, QObject, QAbstractListModel, pyqtSignal,
+                          QModelIndex, QRect, QRectF, QSize, QEvent, QFileSystemWatcher)
+from PyQt5.QtGui import (QFont, QDesktopServices, QColor, QPainter, QRegion, QKeySequence, QFontMetrics,
+                         QPixmap)
+
+from alerts import AlertDispatcher, load_local_alerts
+from app_paths import data_dir, resource_path
+from timer_catalog import TimerCatalog, diff_catalogs, spec_timeline
+from session_journal import START, SELECT, STOP, SessionJournal
+from timer_engine import RUNNING, WARNING_SECONDS, TimerEngine
 
 # 版本信息
 VERSION = "1.0.0"
 UPDATE_CHECK_URL = "https://yolindung.github.io/perfect-timer-updates/version.json"
+CATALOG_CHECK_URL = "https://yolindung.github.io/perfect-timer-updates/catalog/catalog.json"
 
-def calculate_md5(file_path):
-    """计算文件的MD5值"""
-    md5_hash = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            md5_hash.update(chunk)
-    return md5_hash.hexdigest()
-
-def download_file(url, progress_dialog):
-    """下载文件并显示进度"""
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.exe') as temp_file:
-            response = urllib.request.urlopen(url)
-            total_size = int(response.headers['Content-Length'])
-            downloaded_size = 0
-            
-            progress_dialog.setMaximum(total_size)
-            
-            while True:
-                buffer = response.read(8192)
-                if not buffer:
-                    break
-                    
-                downloaded_size += len(buffer)
-                temp_file.write(buffer)
-                progress_dialog.setValue(downloaded_size)
-                
-            return temp_file.name
-    except Exception as e:
-        QMessageBox.critical(None, "下载错误", f"下载文件时出错：{str(e)}")
-        return None
+# 启动完成后等待多久再检查更新（毫秒），避免与首帧绘制争抢资源
+UPDATE_CHECK_DELAY = 3000
+
+# 计时器行复用池最多保留的空闲行数
+TIMER_POOL_LIMIT = 32
+# 机制数量超过该值时自动改用只绘制可见行的列表模式
+LIST_VIEW_THRESHOLD = 50
+
+class StartupProfile:
+    """记录启动各阶段耗时（--profile-startup）"""
+
+    def __init__(self, begin):
+        self.begin = begin
+        self.last = begin
+        self.phases = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        lines = ["启动耗时："]
+        for name, elapsed in self.phases:
+            lines.append(f"  {name:<14}{elapsed * 1000:8.1f} ms")
+        lines.append(f"  {'total':<14}{(self.last - self.begin) * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+# 倒计时显示状态：剩余秒数不超过WARNING_SECONDS时用警告色绘制
+TIME_STATE_NORMAL = "normal"
+TIME_STATE_WARNING = "warning"
+
+def time_state(value):
+    """根据剩余秒数返回显示状态"""
+    return TIME_STATE_WARNING if value <= WARNING_SECONDS else TIME_STATE_NORMAL
+
+class RenderCounter:
+    """统计数字图集重新渲染的次数（只应在字体、DPI或主题变化时发生）"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.total = 0
+        self._recent = deque()
+
+    def record(self):
+        self.total += 1
+        self._recent.append(self.clock())
+
+    def per_minute(self):
+        """最近60秒内的重新渲染次数"""
+        cutoff = self.clock() - 60
+        while self._recent and self._recent[0] < cutoff:
+            self._recent.popleft()
+        return len(self._recent)
+
+atlas_counter = RenderCounter()
+
+WARNING_COLOR = QColor("red")
+DIGIT_GLYPHS = "0123456789."
+DIGIT_ATLAS_LIMIT = 16
+
+class DigitAtlas:
+    """把数字0-9和小数点按正常色和警告色预先渲染到一张位图上，显示新数值时只需几次贴图，不再排版文字
+
+    按(字体, 设备像素比, 颜色)缓存；主题变化时清空，换到不同DPI的屏幕时自动取对应的图集。
+    """
+    _cache = OrderedDict()
+
+    @classmethod
+    def get(cls, font, dpr, color, warning_color=WARNING_COLOR):
+        key = (font.key(), round(dpr, 3), color.rgba(), warning_color.rgba())
+        atlas = cls._cache.get(key)
+        if atlas is None:
+            atlas = cls._cache[key] = cls(font, dpr, color, warning_color)
+            atlas_counter.record()
+            if len(cls._cache) > DIGIT_ATLAS_LIMIT:
+                cls._cache.popitem(last=False)
+        else:
+            cls._cache.move_to_end(key)
+        return atlas
+
+    @classmethod
+    def invalidate(cls):
+        cls._cache.clear()
+
+    def __init__(self, font, dpr, color, warning_color):
+        metrics = QFontMetrics(font)
+        self.dpr = dpr
+        self.height = metrics.height()
+        self.widths = {}
+        self.offsets = {}
+        x = 0
+        for glyph in DIGIT_GLYPHS:
+            self.offsets[glyph] = x
+            self.widths[glyph] = metrics.horizontalAdvance(glyph)
+            x += self.widths[glyph]
+        # 第一行正常色，第二行警告色
+        self.pixmap = QPixmap(math.ceil(x * dpr), math.ceil(self.height * 2 * dpr))
+        self.pixmap.setDevicePixelRatio(dpr)
+        self.pixmap.fill(Qt.transparent)
+        painter = QPainter(self.pixmap)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        painter.setFont(font)
+        for row, pen in enumerate((color, warning_color)):
+            painter.setPen(pen)
+            for glyph in DIGIT_GLYPHS:
+                painter.drawText(QRectF(self.offsets[glyph], row * self.height, self.widths[glyph], self.height),
+                                 Qt.AlignCenter, glyph)
+        painter.end()
+
+    def text_width(self, text):
+        return sum(self.widths.get(glyph, 0) for glyph in text)
+
+    def draw(self, painter, rect, value, tenths=None):
+        """在rect中居中绘制数值；tenths不为None时显示一位小数"""
+        text = str(value) if tenths is None else f"{value}.{tenths}"
+        dpr = self.dpr
+        height = self.height
+        x = rect.x() + (rect.width() - self.text_width(text)) / 2
+        y = rect.y() + (rect.height() - height) / 2
+        top = height * dpr if time_state(value) == TIME_STATE_WARNING else 0
+        for glyph in text:
+            width = self.widths.get(glyph)
+            if width is None:
+                continue
+            painter.drawPixmap(QRectF(x, y, width, height), self.pixmap,
+                               QRectF(self.offsets[glyph] * dpr, top, width * dpr, height * dpr))
+            x += width
+
+class CountdownLabel(QWidget):
+    """倒计时数字：用DigitAtlas贴图绘制，数值不变时不重绘；背景仍可用样式表设置"""
+
+    def __init__(self, font, color=None, parent=None):
+        super().__init__(parent)
+        self.setFont(font)
+        self.color = color  # None表示使用调色板的文字颜色
+        self.value = None
+        self.tenths = None
+        self.atlas = None
+
+    def set_value(self, value, tenths=None):
+        if value != self.value or tenths != self.tenths:
+            self.value = value
+            self.tenths = tenths
+            self.update()
+
+    def sizeHint(self):
+        metrics = QFontMetrics(self.font())
+        return QSize(metrics.horizontalAdvance("000"), metrics.height())
+
+    def changeEvent(self, event):
+        if event.type() in (QEvent.FontChange, QEvent.PaletteChange, QEvent.StyleChange):
+            self.atlas = None
+        super().changeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        option = QStyleOption()
+        option.initFrom(self)
+        self.style().drawPrimitive(QStyle.PE_Widget, option, painter, self)
+        if self.value is None:
+            return
+        dpr = self.devicePixelRatioF()
+        if self.atlas is None or self.atlas.dpr != dpr:
+            color = self.color if self.color is not None else self.palette().windowText().color()
+            self.atlas = DigitAtlas.get(self.font(), dpr, color)
+        self.atlas.draw(painter, self.contentsRect(), self.value, self.tenths)
 
-def check_for_updates():
-    """检查更新"""
-    try:
-        response = urllib.request.urlopen(UPDATE_CHECK_URL)
-        data = json.loads(response.read())
-        if data['version'] > VERSION:
-            return True, data['version'], data['download_url'], data.get('release_notes', ''), data.get('release_date', ''), data.get('md5', '')
-    except:
-        pass
-    return False, None, None, None, None, None
+def spec_phases(spec):
+    return spec.intervals, spec.repeat
+
+def occurrence_keys(names):
+    """同一BOSS下可能有同名机制，按出现顺序编号为(名称, 第几个)，热重载时按此对应新旧计时器行"""
+    seen = {}
+    keys = []
+    for name in names:
+        count = seen.get(name, 0)
+        keys.append((name, count))
+        seen[name] = count + 1
+    return keys
+
+class LogTriggerBridge(QObject):
+    """把日志线程中的触发转交到GUI线程"""
+    triggered = pyqtSignal(object, float)
+
+class TimerScheduler(QObject):
+    """用单个QTimer驱动TimerEngine：只在下一个显示边界唤醒一次"""
+
+    def __init__(self, parent=None, engine=None):
+        super().__init__(parent)
+        self.engine = engine if engine is not None else TimerEngine()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+        self._deadline = None
+        self.stats = None  # TickStats；为None时不做任何统计
+        self.tick_listeners = []  # listener([(id, 新值)])，每次推进后调用
+
+    def add(self, period, callback, timeline=None):
+        return self.engine.add(period, callback, timeline)
+
+    def remove(self, tid):
+        self.engine.remove(tid)
+        self._schedule()
+
+    def start(self, tid, epoch=None):
+        """启动计时器；同时启动的一组计时器应传入同一个epoch"""
+        value = self.engine.start(tid, epoch)
+        self._schedule()
+        return value
+
+    def stop(self, tid):
+        value = self.engine.stop(tid)
+        self._schedule()
+        return value
+
+    def is_running(self, tid):
+        return self.engine.is_running(tid)
+
+    def remaining(self, tid):
+        return self.engine.value(tid)
+
+    def _schedule(self):
+        now = self.engine.clock()
+        deadline = self.engine.next_deadline(now)
+        if deadline is None:
+            self._timer.stop()
+            return
+        self._deadline = deadline
+        self._timer.start(max(0, math.ceil((deadline - now) * 1000)))
+
+    def _on_timeout(self):
+        stats = self.stats
+        if stats is None:
+            changed = self.engine.tick()
+        else:
+            # 一次推进包含 update_time -> update_display -> 悬浮窗更新 的整条调用链
+            fired = self.engine.clock()
+            rebuilt = atlas_counter.total
+            begin = time.perf_counter()
+            changed = self.engine.tick(fired)
+            stats.record(self._deadline, fired, time.perf_counter() - begin, len(changed),
+                         atlas_counter.total - rebuilt)
+        for listener in self.tick_listeners:
+            listener(changed)
+        self._schedule()
 
 class FloatWindow(QWidget):
     _instances = []  # 用于跟踪所有悬浮窗实例
@@ -139,16 +358,14 @@ class FloatWindow(QWidget):
         layout.addLayout(top_layout)
 
         # 时间标签
-        self.time_label = QLabel(str(self.current_time))
-        self.time_label.setFont(QFont("Microsoft YaHei", 60, QFont.Weight.Bold))
-        self.time_label.setAlignment(Qt.AlignCenter)
+        self.time_label = CountdownLabel(QFont("Microsoft YaHei", 60, QFont.Weight.Bold), QColor("white"))
         self.time_label.setStyleSheet("""
-            QLabel {
-                color: white;
+            CountdownLabel {
                 border: none;
                 background: transparent;
             }
         """)
+        self.time_label.set_value(self.current_time)
         layout.addWidget(self.time_label)
         layout.addStretch()
 
@@ -161,25 +378,9 @@ class FloatWindow(QWidget):
             }
         """)
 
-    def update_time(self, time):
+    def update_time(self, time, tenths=None):
         self.current_time = time
-        self.time_label.setText(str(time))
-        if time <= 3:
-            self.time_label.setStyleSheet("""
-                QLabel {
-                    color: red;
-                    border: none;
-                    background: transparent;
-                }
-            """)
-        else:
-            self.time_label.setStyleSheet("""
-                QLabel {
-                    color: white;
-                    border: none;
-                    background: transparent;
-                }
-            """)
+        self.time_label.set_value(time, tenths)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -194,15 +395,161 @@ class FloatWindow(QWidget):
     def mouseReleaseEvent(self, event):
         self.old_pos = None
 
-class TimerWindow(QFrame):
-    def __init__(self, name, time, description, parent=None, on_all_float_closed=None):
-        super().__init__(parent)
+class OverlayCounter:
+    """合成悬浮层中的一个计数器，接口与FloatWindow一致（update_time/show/close）"""
+    SIZE = 100
+    CLOSE_SIZE = 22
+
+    def __init__(self, overlay, name, time, on_all_closed=None):
+        self.overlay = overlay
         self.name = name
-        self.time = time
-        self.description = description
         self.current_time = time
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_time)
+        self.tenths = None
+        self.on_all_closed = on_all_closed
+        self.rect = QRect(0, 0, self.SIZE, self.SIZE)
+
+    def close_rect(self):
+        return QRect(self.rect.right() - 10 - self.CLOSE_SIZE, self.rect.top() + 10,
+                     self.CLOSE_SIZE, self.CLOSE_SIZE)
+
+    def update_time(self, time, tenths=None):
+        if self.current_time != time or self.tenths != tenths:
+            self.current_time = time
+            self.tenths = tenths
+            self.overlay.update(self.rect)  # 只重绘该计数器所在区域
+
+    def isVisible(self):
+        return self in self.overlay.counters and self.overlay.isVisible()
+
+    def show(self):
+        self.overlay.show_counter(self)
+
+    def close(self):
+        self.overlay.remove_counter(self)
+
+class FloatOverlay(QWidget):
+    """所有悬浮计数器共用的一个透明置顶窗口，避免每个计时器各占一个原生窗口"""
+
+    def __init__(self):
+        super().__init__(None, Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.counters = []
+        self.drag_counter = None
+        self.old_pos = None
+        self.name_font = QFont("华文楷体", 12)
+        self.time_font = QFont("Microsoft YaHei", 60, QFont.Weight.Bold)
+        self.close_font = QFont()
+        self.close_font.setPixelSize(16)
+        screen = QApplication.primaryScreen()
+        if screen is not None:
+            self.setGeometry(screen.virtualGeometry())
+
+    def add_counter(self, name, time, on_all_closed=None):
+        counter = OverlayCounter(self, name, time, on_all_closed)
+        # 与FloatWindow相同的层叠位置
+        index = len(self.counters)
+        origin = self.mapFromGlobal(FloatWindow._base_position)
+        counter.rect.moveTo(origin.x() + index * FloatWindow._offset, origin.y() + index * FloatWindow._offset)
+        return counter
+
+    def show_counter(self, counter):
+        if counter not in self.counters:
+            self.counters.append(counter)
+            self.update_mask()
+            self.update(counter.rect)
+        if not self.isVisible():
+            self.show()
+
+    def remove_counter(self, counter):
+        if counter not in self.counters:
+            return
+        self.counters.remove(counter)
+        if self.drag_counter is counter:
+            self.drag_counter = None
+        self.update(counter.rect)
+        self.update_mask()
+        if not self.counters:
+            self.hide()
+            if counter.on_all_closed:
+                counter.on_all_closed()
+
+    def update_mask(self):
+        # 只有计数器区域接收鼠标，其余区域点击穿透到游戏
+        region = QRegion()
+        for counter in self.counters:
+            region = region.united(QRegion(counter.rect))
+        self.setMask(region if self.counters else QRegion(0, 0, 1, 1))
+
+    def counter_at(self, pos):
+        for counter in reversed(self.counters):
+            if counter.rect.contains(pos):
+                return counter
+        return None
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        dirty = event.rect()
+        atlas = DigitAtlas.get(self.time_font, self.devicePixelRatioF(), QColor("white"))
+        for counter in self.counters:
+            if not counter.rect.intersects(dirty):
+                continue
+            rect = counter.rect
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(0, 0, 0, 179))  # 黑色背景，透明度70%
+            painter.drawRoundedRect(QRectF(rect), 20, 20)
+
+            close_rect = counter.close_rect()
+            painter.setBrush(QColor(255, 80, 80, 200))
+            painter.drawEllipse(QRectF(close_rect))
+            painter.setPen(QColor("white"))
+            painter.setFont(self.close_font)
+            painter.drawText(close_rect, Qt.AlignCenter, "×")
+
+            painter.setFont(self.name_font)
+            name_rect = QRect(rect.left() + 10, rect.top() + 10, close_rect.left() - rect.left() - 15,
+                              OverlayCounter.CLOSE_SIZE)
+            painter.drawText(name_rect, Qt.AlignLeft | Qt.AlignVCenter, counter.name)
+
+            time_rect = QRect(rect.left(), name_rect.bottom(), rect.width(), rect.bottom() - name_rect.bottom() - 5)
+            atlas.draw(painter, time_rect, counter.current_time, counter.tenths)
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton:
+            return
+        counter = self.counter_at(event.pos())
+        if counter is None:
+            return
+        if counter.close_rect().contains(event.pos()):
+            counter.close()
+            return
+        self.drag_counter = counter
+        self.old_pos = event.pos()
+
+    def mouseMoveEvent(self, event):
+        if self.drag_counter and self.old_pos:
+            old_rect = QRect(self.drag_counter.rect)
+            self.drag_counter.rect.translate(event.pos() - self.old_pos)
+            self.old_pos = event.pos()
+            self.update_mask()
+            self.update(old_rect.united(self.drag_counter.rect))
+
+    def mouseReleaseEvent(self, event):
+        self.drag_counter = None
+        self.old_pos = None
+
+class TimerWindow(QFrame):
+    def __init__(self, spec, parent=None, on_all_float_closed=None, scheduler=None, float_factory=FloatWindow):
+        super().__init__(parent)
+        self.float_factory = float_factory
+        self.name = spec.name
+        self.time = spec.time
+        self.description = spec.description
+        self.phases = spec_phases(spec)
+        self.scheduler = scheduler if scheduler is not None else TimerScheduler(self)
+        self.timer_id = self.scheduler.add(spec.time, self.update_time, spec_timeline(spec))
+        self.current_time = self.scheduler.remaining(self.timer_id)
         self.float_window = None
         self.on_all_float_closed = on_all_float_closed
         self.init_ui()
@@ -229,17 +576,15 @@ class TimerWindow(QFrame):
         time_layout.setContentsMargins(0, 0, 0, 0)
         time_container.setLayout(time_layout)
         
-        self.time_label = QLabel(str(self.current_time))
-        self.time_label.setFont(QFont("Microsoft YaHei", 40, QFont.Weight.Bold))
-        self.time_label.setAlignment(Qt.AlignCenter)
+        self.time_label = CountdownLabel(QFont("Microsoft YaHei", 40, QFont.Weight.Bold))
         self.time_label.setStyleSheet("""
-            QLabel {
+            CountdownLabel {
                 background-color: rgba(240, 240, 240, 200);
                 border: none;
                 border-radius: 10px;
-                padding: 5px;
             }
         """)
+        self.time_label.set_value(self.current_time)
         time_layout.addWidget(self.time_label)
         main_layout.addWidget(time_container)
         
@@ -253,32 +598,32 @@ class TimerWindow(QFrame):
         info_container.setLayout(info_layout)
         
         # 名称标签
-        name_label = QLabel(self.name)
-        name_label.setFont(QFont("华文楷体", 30, QFont.Weight.Bold))
-        name_label.setFixedWidth(200)
-        name_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        name_label.setStyleSheet("""
+        self.name_label = QLabel(self.name)
+        self.name_label.setFont(QFont("华文楷体", 30, QFont.Weight.Bold))
+        self.name_label.setFixedWidth(200)
+        self.name_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        self.name_label.setStyleSheet("""
             QLabel {
                 background-color: transparent;
                 border: none;
                 padding: 5px;
             }
         """)
-        info_layout.addWidget(name_label)
+        info_layout.addWidget(self.name_label)
         
         # 介绍标签
-        desc_label = QLabel(self.description)
-        desc_label.setFont(QFont("华文楷体", 14))
-        desc_label.setWordWrap(True)
-        desc_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        desc_label.setMinimumHeight(40)  # 设置最小高度
-        desc_label.setStyleSheet("""
+        self.desc_label = QLabel(self.description)
+        self.desc_label.setFont(QFont("华文楷体", 14))
+        self.desc_label.setWordWrap(True)
+        self.desc_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        self.desc_label.setMinimumHeight(40)  # 设置最小高度
+        self.desc_label.setStyleSheet("""
             QLabel {
                 line-height: 200%;  /* 设置2倍行间距 */
                 background-color: transparent;  /* 移除背景色 */
             }
         """)
-        info_layout.addWidget(desc_label)
+        info_layout.addWidget(self.desc_label)
         
         main_layout.addWidget(info_container)
         
@@ -339,44 +684,62 @@ class TimerWindow(QFrame):
             }
         """)
 
+    def bind(self, spec):
+        """复用已有控件显示新的计时器数据，避免重建整行控件"""
+        self.hide_float_window()
+        self.scheduler.engine.set_period(self.timer_id, spec.time)
+        self.scheduler.engine.set_timeline(self.timer_id, spec_timeline(spec))
+        self.phases = spec_phases(spec)
+        self.name = spec.name
+        self.time = spec.time
+        self.description = spec.description
+        self.name_label.setText(spec.name)
+        self.desc_label.setText(spec.description)
+        self.reset_timer()
+
+    def set_description(self, description):
+        self.description = description
+        self.desc_label.setText(description)
+
+    def is_running(self):
+        return self.scheduler.is_running(self.timer_id)
+
     def toggle_timer(self):
-        if self.timer.isActive():
-            self.timer.stop()
-            self.current_time = self.time  # 停止时显示预设值
-            self.update_display()
-            self.start_button.setText("开始")
+        if self.is_running():
+            self.reset_timer()  # 停止时显示预设值
         else:
-            self.current_time = self.time - 1  # 启动时从预设值-1开始
-            self.update_display()
-            self.timer.start(1000)
-            self.start_button.setText("停止")
+            self.start_timer()
+
+    def start_timer(self, epoch=None):
+        self.current_time = self.scheduler.start(self.timer_id, epoch)  # 启动时从预设值-1开始
+        self.update_display()
+        self.start_button.setText("停止")
 
     def reset_timer(self):
-        self.timer.stop()
-        self.current_time = self.time
+        self.current_time = self.scheduler.stop(self.timer_id)
         self.update_display()
         self.start_button.setText("开始")
 
-    def update_time(self):
-        if self.current_time > 0:
-            self.current_time -= 1
-        else:
-            self.current_time = self.time - 1  # 循环时也从预设值-1开始
+    def update_time(self, value):
+        # 由引擎按起点算出的剩余秒数驱动，不再逐次递减累积误差
+        self.current_time = value
         self.update_display()
 
     def update_display(self):
-        self.time_label.setText(str(self.current_time))
-        if self.current_time <= 3:
-            self.time_label.setStyleSheet("color: red")
-        else:
-            self.time_label.setStyleSheet("")
+        self.time_label.set_value(self.current_time)
         
         if self.float_window:
             self.float_window.update_time(self.current_time)
 
+    def show_tenths(self, value, tenths):
+        """由TenthsPacer在最后几秒调用；tenths为None时恢复整秒显示"""
+        self.time_label.set_value(value, tenths)
+        if self.float_window:
+            self.float_window.update_time(value, tenths)
+
     def show_float_window(self):
         if not self.float_window:
-            self.float_window = FloatWindow(self.name, self.current_time, on_all_closed=self.on_all_float_closed)
+            self.float_window = self.float_factory(self.name, self.current_time, on_all_closed=self.on_all_float_closed)
             self.float_window.show()
 
     def hide_float_window(self):
@@ -384,12 +747,764 @@ class TimerWindow(QFrame):
             self.float_window.close()
             self.float_window = None
 
+class TimerRow:
+    """列表模式中的一行：只保存数据和引擎id，不持有任何控件"""
+    __slots__ = ('tid', 'position', 'name', 'time', 'description', 'phases', 'current_time', 'tenths', 'float_window')
+
+    def __init__(self, tid, name, time, description):
+        self.tid = tid
+        self.position = 0
+        self.phases = ((), 'last')
+        self.name = name
+        self.time = time
+        self.description = description
+        self.current_time = time
+        self.tenths = None
+        self.float_window = None
+
+class TimerListModel(QAbstractListModel):
+    """列表模式的数据模型：行由TimerDelegate绘制，只有可见行会被绘制"""
+
+    def __init__(self, scheduler, parent=None, on_all_float_closed=None, float_factory=FloatWindow):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.float_factory = float_factory
+        self.on_all_float_closed = on_all_float_closed
+        self.rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return row.name
+        if role == Qt.ToolTipRole:
+            return row.description
+        return None
+
+    def set_entries(self, entries):
+        self.beginResetModel()
+        for row in self.rows:
+            self._close_float(row)
+            self.scheduler.remove(row.tid)
+        self.rows = [self._new_row(spec) for spec in entries]
+        self._renumber()
+        self.endResetModel()
+
+    def update_entries(self, entries):
+        """热重载时按机制名称（同名的按出现顺序）复用已有行：定义未变的行保持运行状态"""
+        self.beginResetModel()
+        old_rows = dict(zip(occurrence_keys(row.name for row in self.rows), self.rows))
+        rows = []
+        for key, spec in zip(occurrence_keys(spec.name for spec in entries), entries):
+            row = old_rows.pop(key, None)
+            if row is None:
+                row = self._new_row(spec)
+            elif (row.time, row.phases) != (spec.time, spec_phases(spec)):
+                self.scheduler.stop(row.tid)
+                self.scheduler.engine.set_period(row.tid, spec.time)
+                self.scheduler.engine.set_timeline(row.tid, spec_timeline(spec))
+                row.time = spec.time
+                row.phases = spec_phases(spec)
+                row.current_time = self.scheduler.remaining(row.tid)
+            row.description = spec.description
+            rows.append(row)
+        for row in old_rows.values():
+            self._close_float(row)
+            self.scheduler.remove(row.tid)
+        self.rows = rows
+        self._renumber()
+        self.endResetModel()
+
+    def _new_row(self, spec):
+        row = TimerRow(None, spec.name, spec.time, spec.description)
+        row.phases = spec_phases(spec)
+        row.tid = self.scheduler.add(spec.time, self._make_callback(row), spec_timeline(spec))
+        row.current_time = self.scheduler.remaining(row.tid)
+        return row
+
+    def _renumber(self):
+        for position, row in enumerate(self.rows):
+            row.position = position
+
+    def _make_callback(self, row):
+        def callback(value):
+            self.set_value(row.position, value)
+        return callback
+
+    def set_value(self, position, value):
+        row = self.rows[position]
+        row.current_time = value
+        row.tenths = None
+        index = self.index(position)
+        self.dataChanged.emit(index, index)
+        if row.float_window:
+            row.float_window.update_time(value)
+
+    def show_tenths(self, position, value, tenths):
+        """由TenthsPacer在最后几秒调用；tenths为None时恢复整秒显示"""
+        row = self.rows[position]
+        if (row.current_time, row.tenths) != (value, tenths):
+            row.current_time = value
+            row.tenths = tenths
+            index = self.index(position)
+            self.dataChanged.emit(index, index)
+        if row.float_window:
+            row.float_window.update_time(value, tenths)
+
+    def is_running(self, position):
+        return self.scheduler.is_running(self.rows[position].tid)
+
+    def toggle(self, position):
+        if self.is_running(position):
+            self.reset(position)
+        else:
+            self.start(position)
+
+    def start(self, position, epoch=None):
+        self.set_value(position, self.scheduler.start(self.rows[position].tid, epoch))
+
+    def reset(self, position):
+        self.set_value(position, self.scheduler.stop(self.rows[position].tid))
+
+    def start_all(self, epoch):
+        for position in range(len(self.rows)):
+            if not self.is_running(position):
+                self.start(position, epoch)
+
+    def reset_all(self):
+        for position in range(len(self.rows)):
+            self.reset(position)
+
+    def set_float_windows(self, enabled):
+        for row in self.rows:
+            if enabled and not row.float_window:
+                row.float_window = self.float_factory(row.name, row.current_time, on_all_closed=self.on_all_float_closed)
+                row.float_window.show()
+            elif not enabled:
+                self._close_float(row)
+
+    def _close_float(self, row):
+        if row.float_window:
+            row.float_window.close()
+            row.float_window = None
+
+class TimerDelegate(QStyledItemDelegate):
+    """按TimerWindow的外观直接绘制计时器行，并处理开始/复位按钮的点击"""
+    ROW_HEIGHT = 100
+    SPACING = 15
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.time_font = QFont("Microsoft YaHei", 40, QFont.Weight.Bold)
+        self.name_font = QFont("华文楷体", 30, QFont.Weight.Bold)
+        self.desc_font = QFont("华文楷体", 14)
+        self.button_font = QFont()
+        self.button_font.setPixelSize(16)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT + self.SPACING)
+
+    def _rects(self, rect):
+        row = QRect(rect.left() + 5, rect.top() + self.SPACING, rect.width() - 10, self.ROW_HEIGHT)
+        time_rect = QRect(row.left() + 5, row.top() + 5, 80, row.height() - 10)
+        info_rect = QRect(time_rect.right() + 10, row.top() + 5, 250, row.height() - 10)
+        start_rect = QRect(row.right() - 75, row.top() + 12, 70, 35)
+        reset_rect = QRect(row.right() - 75, row.bottom() - 47, 70, 35)
+        return row, time_rect, info_rect, start_rect, reset_rect
+
+    def paint(self, painter, option, index):
+        model = index.model()
+        row = model.rows[index.row()]
+        row_rect, time_rect, info_rect, start_rect, reset_rect = self._rects(option.rect)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(255, 255, 255, 128))
+        painter.drawRoundedRect(QRectF(row_rect), 10, 10)
+        painter.setBrush(QColor(240, 240, 240, 200))
+        painter.drawRoundedRect(QRectF(time_rect), 10, 10)
+
+        atlas = DigitAtlas.get(self.time_font, painter.device().devicePixelRatioF(), option.palette.text().color())
+        atlas.draw(painter, time_rect, row.current_time, row.tenths)
+
+        painter.setPen(option.palette.text().color())
+        painter.setFont(self.name_font)
+        name_rect = QRect(info_rect.left(), info_rect.top(), 200, info_rect.height() // 2)
+        painter.drawText(name_rect, Qt.AlignLeft | Qt.AlignVCenter, row.name)
+        painter.setFont(self.desc_font)
+        desc_rect = QRect(info_rect.left(), name_rect.bottom(), info_rect.width(), info_rect.height() // 2)
+        painter.drawText(desc_rect, Qt.AlignLeft | Qt.AlignVCenter | Qt.TextWordWrap, row.description)
+
+        painter.setFont(self.button_font)
+        running = model.is_running(index.row())
+        for rect, color, text in ((start_rect, QColor("#5bc47a"), "停止" if running else "开始"),
+                                  (reset_rect, QColor("#ff5c5c"), "复位")):
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(color)
+            painter.drawRoundedRect(QRectF(rect), 8, 8)
+            painter.setPen(QColor("#fff"))
+            painter.drawText(rect, Qt.AlignCenter, text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            _, _, _, start_rect, reset_rect = self._rects(option.rect)
+            if start_rect.contains(event.pos()):
+                model.toggle(index.row())
+                return True
+            if reset_rect.contains(event.pos()):
+                model.reset(index.row())
+                return True
+        return super().editorEvent(event, model, option, index)
+
+class DebugPanel(QWidget):
+    """隐藏的调试面板（Ctrl+Shift+F12）：推进延迟直方图、处理耗时、图集重建和控件数量"""
+
+    def __init__(self, scheduler, stats, alerts=None):
+        super().__init__(None, Qt.Tool | Qt.WindowStaysOnTopHint)
+        self.scheduler = scheduler
+        self.stats = stats
+        self.alerts = alerts
+        self.setWindowTitle("调试面板")
+        layout = QVBoxLayout(self)
+        self.report_label = QLabel()
+        self.report_label.setFont(QFont("Consolas", 9))
+        self.report_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        layout.addWidget(self.report_label)
+        buttons = QHBoxLayout()
+        export_button = QPushButton("导出JSON lines")
+        export_button.clicked.connect(self.export)
+        clear_button = QPushButton("清空")
+        clear_button.clicked.connect(self.clear)
+        buttons.addWidget(export_button)
+        buttons.addWidget(clear_button)
+        layout.addLayout(buttons)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start(1000)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        windows = sum(1 for widget in QApplication.topLevelWidgets() if widget.isVisible())
+        self.stats.sample(len(QApplication.allWidgets()), windows)
+        report = self.stats.report()
+        report += f"\n\n数字图集重建：共 {atlas_counter.total} 次，最近一分钟 {atlas_counter.per_minute()} 次"
+        if self.alerts is not None:
+            report += "\n\n" + self.alerts.report()
+        self.report_label.setText(report)
+
+    def export(self):
+        path = os.path.join(data_dir('debug'), time.strftime('tick_stats-%Y%m%d-%H%M%S.jsonl'))
+        try:
+            self.stats.export(path)
+            self.status_label.setText(f"已导出：{path}")
+        except OSError as e:
+            self.status_label.setText(f"导出失败：{e}")
+
+    def clear(self):
+        self.stats.clear()
+        self.refresh()
+
+class AlertNotifier(QObject):
+    """提醒的桌面通知：后台线程发出信号，在GUI线程中用托盘图标显示"""
+    message = pyqtSignal(str, str)
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.tray = None
+        self.message.connect(self.show_message)
+
+    def notify(self, title, text):
+        self.message.emit(title, text)  # 跨线程信号自动排队，不等待显示完成
+
+    def show_message(self, title, text):
+        if self.tray is None:
+            self.tray = QSystemTrayIcon(self.window.windowIcon(), self)
+            self.tray.show()
+        self.tray.showMessage(title, text, QSystemTrayIcon.Information, 5000)
+
+class TenthsPacer(QObject):
+    """高精度显示：最后WARNING_SECONDS秒内显示十分之一秒
+
+    所有计时器共用一个单次QTimer，只在最近的一个0.1秒边界唤醒一次，同一帧内一起重绘。
+    没有处于最后几秒且可见（主窗口未最小化、行在滚动区域内可见或悬浮窗显示中）的计时器时不唤醒，
+    显示值每次都按引擎起点重新计算，暂停绘制不影响计时精度。
+    """
+
+    def __init__(self, scheduler, window, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.window = window
+        self.shown = set()  # 正在显示小数的计时器行（TimerWindow或列表模式的TimerRow）
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self.refresh)
+        self._refresh_scheduled = False
+
+    def schedule_refresh(self, *args):
+        """合并同一轮事件循环中的多次请求"""
+        if not self._refresh_scheduled:
+            self._refresh_scheduled = True
+            QTimer.singleShot(0, self.refresh)
+
+    def refresh(self, *args):
+        self._refresh_scheduled = False
+        engine = self.scheduler.engine
+        now = engine.clock()
+        shown = set()
+        deadline = None
+        window = self.window
+        for row in window.current_timer_rows():
+            tid = window.row_tid(row)
+            if not engine.is_running(tid) or not window.is_row_visible(row):
+                continue
+            value = engine.value(tid, now)
+            if value > WARNING_SECONDS:
+                continue
+            fraction = (now - engine.epochs[tid]) % 1.0
+            step = min(9, int(fraction * 10))
+            window.show_row_tenths(row, value, 9 - step)
+            shown.add(row)
+            boundary = now + (step + 1) / 10 - fraction
+            if deadline is None or boundary < deadline:
+                deadline = boundary
+        for row in self.shown - shown:
+            window.show_row_tenths(row, row.current_time, None)
+        self.shown = shown
+        if deadline is None:
+            self._timer.stop()
+        else:
+            self._timer.start(max(1, math.ceil((deadline - now) * 1000)))
+
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, list_view=False, overlay=False, watch=False, profile=None, control_port=None,
+                 log_path=None, log_encoding='utf-8', debug_panel=False, sync_role=None, sync_port=None,
+                 feed_port=None, tenths=False, catalog_path=None):
+        self.debug_panel = None
+        self.catalog_path = catalog_path  # 指定时只加载该文件（基准测试等），不使用同步的目录
+        self.sync_role = sync_role
+        self.sync_port = sync_port
+        self.sync = None
+        self.state_feed = None
+        self.row_index = {}  # 引擎id -> 当前BOSS中的序号，由link_timer_rows更新
+        self.tenths_enabled = tenths
+        self.tenths_pacer = None
         self.float_windows_enabled = False
+        self.log_path = log_path
+        self.log_encoding = log_encoding
+        self.log_tailer = None
+        self.control_server = None
+        self.profile = profile
+        self.first_painted = False
+        self.catalog = None
+        self.watch_enabled = watch
+        self.last_reload_ms = None
+        self.overlay = FloatOverlay() if overlay else None
+        self.float_factory = self.overlay.add_counter if overlay else FloatWindow
+        self.list_view_enabled = list_view
+        self.list_mode = False
+        self.timer_pool = []  # 空闲的TimerWindow，切换BOSS时复用
+        self.update_service = None
+        self.catalog_sync_task = None  # 每次运行只同步一次目录
+        self.download_task = None
         super().__init__()
+        self.scheduler = TimerScheduler(self)
+        self.init_journal()
+        self.init_alerts()
         self.init_ui()
+        if control_port is not None:
+            self.start_control_server(control_port)
+        if feed_port is not None:
+            self.start_state_feed(feed_port)
+        if tenths:
+            self.start_tenths_pacer()
+        QShortcut(QKeySequence("Ctrl+Shift+F12"), self, self.toggle_debug_panel)
+        if debug_panel:
+            self.toggle_debug_panel()
+        if self.profile:
+            self.profile.mark("init_ui")
+
+    def init_journal(self):
+        """会话日志：记录计时器启停，崩溃或关闭后恢复"""
+        self.journal = SessionJournal(os.path.join(data_dir('session'), 'journal.jsonl'))
+        self.journal_timer = QTimer(self)
+        self.journal_timer.setSingleShot(True)
+        self.journal_timer.setInterval(200)  # 批量写入，避免每个事件都落盘
+        self.journal_timer.timeout.connect(self.flush_journal)
+        self.scheduler.engine.listeners.append(self.on_timer_state_changed)
+
+    def init_alerts(self):
+        """目录和用户配置中声明的提醒动作：倒计时越过阈值时在后台线程执行，不阻塞推进和重绘"""
+        notifier = None
+        if QSystemTrayIcon.isSystemTrayAvailable():
+            notifier = AlertNotifier(self).notify
+        self.alerts = AlertDispatcher(notifier=notifier, local=load_local_alerts())
+        self.alerts.attach(self.scheduler.engine)
+        self.scheduler.tick_listeners.append(self.alerts.on_tick)
+
+    def record_journal(self, kind, **fields):
+        self.journal.record(kind, mono=self.scheduler.engine.clock(), **fields)
+        if not self.journal_timer.isActive():
+            self.journal_timer.start()
+
+    def flush_journal(self):
+        try:
+            self.journal.flush()
+        except OSError as e:
+            print(f"Error writing session journal: {e}")
+
+    def on_timer_state_changed(self, event, tid, epoch):
+        index, row = self.find_timer_row(tid)
+        if row is None:
+            return
+        if event == RUNNING:
+            self.record_journal(START, i=index, m=row.name, p=row.time, epoch=epoch)
+        else:
+            self.record_journal(STOP, i=index, m=row.name)
+        if self.state_feed is not None:
+            self.state_feed.update(index, self.scheduler.engine.values[tid], event == RUNNING)
+        if self.sync is not None and self.sync.is_leader:
+            if event == RUNNING:
+                self.sync.timer_started(index, epoch)
+            else:
+                self.sync.timer_stopped(index)
+
+    def find_timer_row(self, tid):
+        """按引擎id查找当前BOSS的计时器，返回(序号, 行)；不在当前BOSS中时返回(None, None)"""
+        index = self.row_index.get(tid)
+        if index is None:
+            return None, None
+        if self.list_mode:
+            rows = self.timer_model.rows
+            row = rows[index] if index < len(rows) else None
+        else:
+            item = self.timer_layout.itemAt(index)
+            row = item.widget() if item is not None else None
+            if not isinstance(row, TimerWindow):
+                row = None
+        if row is None or self.row_tid(row) != tid:
+            return None, None  # 切换BOSS或热重载过程中，计时器行已不在原来的位置
+        return index, row
+
+    def restore_session(self):
+        """按会话日志恢复上次的副本选择和正在运行的计时器"""
+        state = self.journal.load()
+        if state.dungeon is None:
+            return
+        index = self.level1_combo.findText(state.dungeon)
+        if index < 0:
+            return
+        self.level1_combo.setCurrentIndex(index)
+        index = self.level2_combo.findText(state.boss)
+        if index < 0:
+            return
+        self.level2_combo.setCurrentIndex(index)
+        mono = self.scheduler.engine.clock()
+        wall = time.time()
+        for index, row in enumerate(self.current_timer_rows()):
+            if state.is_running(index, row.name, row.time):
+                self.start_row(row, state.monotonic_epoch(index, mono, wall))
+
+    def start_control_server(self, port):
+        from control_server import ControlServer
+        self.control_server = ControlServer(self.handle_control_command, port, self)
+        self.control_server.listen()
+
+    def start_tenths_pacer(self):
+        """每次整秒推进、启停、滚动、最小化/还原和悬浮窗开关后重新检查需要显示小数的计时器"""
+        self.tenths_pacer = TenthsPacer(self.scheduler, self, self)
+        self.scheduler.tick_listeners.append(self.tenths_pacer.refresh)
+        self.scheduler.engine.listeners.append(lambda event, tid, epoch: self.tenths_pacer.schedule_refresh())
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.tenths_pacer.schedule_refresh)
+        self.timer_view.verticalScrollBar().valueChanged.connect(self.tenths_pacer.schedule_refresh)
+        self.float_checkbox.stateChanged.connect(self.tenths_pacer.schedule_refresh)
+
+    def start_state_feed(self, port):
+        from state_feed import StateFeed
+        self.state_feed = StateFeed(port, self)
+        if not self.state_feed.listen():
+            self.state_feed = None
+            return
+        self.scheduler.tick_listeners.append(self.on_feed_tick)
+
+    def publish_state_snapshot(self):
+        """切换BOSS或目录更新后，把当前BOSS的全部计时器推送给状态订阅者"""
+        if self.state_feed is None:
+            return
+        rows = self.current_timer_rows()
+        engine = self.scheduler.engine
+        self.state_feed.set_snapshot(self.level1_combo.currentText(), self.level2_combo.currentText(),
+                                     [(row.name, engine.values[self.row_tid(row)], self.is_row_running(row))
+                                      for row in rows])
+
+    def on_feed_tick(self, changed):
+        index = self.row_index
+        engine = self.scheduler.engine
+        for tid, value in changed:
+            if tid in index:
+                self.state_feed.update(index[tid], value, engine.is_running(tid))
+
+    def start_sync(self):
+        from lan_sync import DEFAULT_PORT, LanSync
+        self.sync = LanSync(self, self.sync_role, clock=self.scheduler.engine.clock,
+                            port=self.sync_port or DEFAULT_PORT, parent=self)
+        if not self.sync.start():
+            self.sync = None
+
+    def row_tid(self, row):
+        return row.tid if self.list_mode else row.timer_id
+
+    def sync_state(self):
+        """主控的当前状态：(副本, BOSS, [机制名称], [(序号, 起点)])"""
+        rows = self.current_timer_rows()
+        engine = self.scheduler.engine
+        running = [(index, engine.epochs[self.row_tid(row)]) for index, row in enumerate(rows)
+                   if self.is_row_running(row)]
+        return (self.level1_combo.currentText(), self.level2_combo.currentText(), [row.name for row in rows],
+                running)
+
+    def apply_sync_select(self, dungeon, boss, crc):
+        """跟随主控的副本选择；两边目录中该BOSS的机制不一致时返回False"""
+        from lan_sync import names_crc
+        try:
+            self.select_boss(dungeon, boss)
+        except ValueError as e:
+            print(f"Error following sync leader: {e}")
+            return False
+        if names_crc([row.name for row in self.current_timer_rows()]) != crc:
+            print(f"Error following sync leader: timers of {dungeon}/{boss} differ from the leader's catalog")
+            return False
+        return True
+
+    def apply_sync_snapshot(self, running):
+        epochs = dict(running)
+        engine = self.scheduler.engine
+        for index, row in enumerate(self.current_timer_rows()):
+            epoch = epochs.get(index)
+            if epoch is None:
+                if self.is_row_running(row):
+                    self.reset_row(row)
+            elif not self.is_row_running(row) or abs(engine.epochs[self.row_tid(row)] - epoch) > 0.001:
+                self.start_row(row, epoch)
+
+    def apply_sync_start(self, indices, epoch):
+        rows = self.current_timer_rows()
+        for index in indices:
+            if index < len(rows):
+                self.start_row(rows[index], epoch)
+
+    def apply_sync_stop(self, indices):
+        rows = self.current_timer_rows()
+        for index in indices:
+            if index < len(rows):
+                self.reset_row(rows[index])
+
+    def current_timer_rows(self):
+        """当前BOSS的计时器（TimerWindow或列表模式的TimerRow）"""
+        return list(self.timer_model.rows) if self.list_mode else list(self.timer_rows())
+
+    def is_row_running(self, row):
+        return self.scheduler.is_running(self.row_tid(row))
+
+    def start_row(self, row, epoch):
+        if self.list_mode:
+            self.timer_model.start(row.position, epoch)
+        else:
+            row.start_timer(epoch)
+
+    def reset_row(self, row):
+        if self.list_mode:
+            self.timer_model.reset(row.position)
+        else:
+            row.reset_timer()
+
+    def is_row_visible(self, row):
+        """悬浮窗显示中，或主窗口未最小化且行在滚动区域/列表中可见"""
+        if row.float_window is not None and row.float_window.isVisible():
+            return True
+        if self.isMinimized():
+            return False
+        if isinstance(row, TimerWindow):
+            return not row.time_label.visibleRegion().isEmpty()
+        view = self.timer_view
+        return view.isVisible() and view.visualRect(self.timer_model.index(row.position)).intersects(
+            view.viewport().rect())
+
+    def show_row_tenths(self, row, value, tenths):
+        """TenthsPacer调用；已不在当前列表中的行（切换BOSS后）只清除小数状态"""
+        if isinstance(row, TimerWindow):
+            row.show_tenths(value, tenths)
+        elif row.position < len(self.timer_model.rows) and self.timer_model.rows[row.position] is row:
+            self.timer_model.show_tenths(row.position, value, tenths)
+        else:
+            row.tenths = None
+
+    def select_boss(self, dungeon, boss):
+        """切换到指定副本和BOSS；留空表示保持当前选择"""
+        if dungeon and dungeon != self.level1_combo.currentText():
+            index = self.level1_combo.findText(dungeon)
+            if index < 0:
+                raise ValueError(f"unknown dungeon {dungeon}")
+            self.level1_combo.setCurrentIndex(index)
+        if boss and boss != self.level2_combo.currentText():
+            index = self.level2_combo.findText(boss)
+            if index < 0:
+                raise ValueError(f"unknown boss {boss}")
+            self.level2_combo.setCurrentIndex(index)
+
+    def handle_control_command(self, command):
+        """在GUI线程中执行控制接口的命令，返回回复行"""
+        current = (self.level1_combo.currentText(), self.level2_combo.currentText())
+        if command.kind == "QUERY" and (command.dungeon or current[0], command.boss or current[1]) != current:
+            return self.query_catalog(command)  # QUERY只读，不切换BOSS
+        self.select_boss(command.dungeon, command.boss)
+        rows = [row for row in self.current_timer_rows() if not command.mechanic or row.name == command.mechanic]
+        if not rows:
+            return f"ERR\tunknown mechanic {command.mechanic}"
+        if command.kind == "START":
+            epoch = self.scheduler.engine.clock()  # 同一条命令启动的计时器共享起点
+            for row in rows:
+                if not self.is_row_running(row):
+                    self.start_row(row, epoch)
+        elif command.kind in ("STOP", "RESET"):
+            for row in rows:
+                self.reset_row(row)
+        return "OK\t" + "\t".join(f"{row.name}={row.current_time}{'*' if self.is_row_running(row) else ''}"
+                                    for row in rows)
+
+    def query_catalog(self, command):
+        """QUERY其他BOSS时按目录回答，不切换选择，也不复位正在运行的计时器"""
+        dungeon = command.dungeon or self.level1_combo.currentText()
+        boss = command.boss or self.level2_combo.currentText()
+        if dungeon not in self.catalog.dungeons():
+            raise ValueError(f"unknown dungeon {dungeon}")
+        if boss not in self.catalog.bosses(dungeon):
+            raise ValueError(f"unknown boss {boss}")
+        # 只有当前BOSS的计时器在运行，其他BOSS的机制都显示预设时间
+        specs = [spec for spec in self.catalog.timers(dungeon, boss)
+                 if not command.mechanic or spec.name == command.mechanic]
+        if not specs:
+            return f"ERR\tunknown mechanic {command.mechanic}"
+        return "OK\t" + "\t".join(f"{spec.name}={spec.time}" for spec in specs)
+
+    def start_log_tailer(self):
+        """跟踪战斗日志，出现触发短语时按日志时间启动对应计时器"""
+        from log_tailer import LogTailer, TriggerAutomaton
+        self.log_bridge = LogTriggerBridge(self)
+        self.log_bridge.triggered.connect(self.handle_log_trigger)
+        automaton = TriggerAutomaton((phrase, (dungeon, boss, mechanic))
+                                     for phrase, dungeon, boss, mechanic in self.catalog.triggers())
+        self.log_tailer = LogTailer(self.log_path, automaton, self.log_bridge.triggered.emit,
+                                    encoding=self.log_encoding)
+        self.log_tailer.start()
+
+    def rebuild_log_triggers(self):
+        if self.log_tailer is None:
+            return
+        from log_tailer import TriggerAutomaton
+        automaton = TriggerAutomaton((phrase, (dungeon, boss, mechanic))
+                                     for phrase, dungeon, boss, mechanic in self.catalog.triggers())
+        automaton.build()
+        self.log_tailer.automaton = automaton  # 整体替换，日志线程下一行即使用新的自动机
+
+    def handle_log_trigger(self, target, stamp):
+        dungeon, boss, mechanic = target
+        if (dungeon, boss) != (self.level1_combo.currentText(), self.level2_combo.currentText()):
+            # 只启动当前BOSS的机制：切换BOSS会复位正在运行的计时器，多个BOSS共用的短语也会来回切换
+            return
+        # 日志时间换算为单调时钟起点，抵消读取和处理的延迟
+        epoch = self.scheduler.engine.clock() - max(0.0, time.time() - stamp)
+        for row in self.current_timer_rows():
+            if row.name == mechanic:
+                self.start_row(row, epoch)
+
+    def toggle_debug_panel(self):
+        """打开调试面板时才开始统计，关闭后停止统计，平时没有额外开销"""
+        if self.debug_panel is not None and self.debug_panel.isVisible():
+            self.debug_panel.hide()
+            self.scheduler.stats = None
+            return
+        if self.debug_panel is None:
+            from tick_stats import TickStats
+            self.debug_panel = DebugPanel(self.scheduler, TickStats(), self.alerts)
+        self.scheduler.stats = self.debug_panel.stats
+        self.debug_panel.show()
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange and self.tenths_pacer is not None:
+            self.tenths_pacer.schedule_refresh()
+        if event.type() in (QEvent.PaletteChange, QEvent.StyleChange):
+            # 系统主题（调色板/样式）变化后重新渲染数字图集
+            DigitAtlas.invalidate()
+            for widget in QApplication.allWidgets():
+                if isinstance(widget, CountdownLabel):
+                    widget.atlas = None
+                    widget.update()
+            if self.overlay is not None:
+                self.overlay.update()
+        super().changeEvent(event)
+
+    def closeEvent(self, event):
+        if self.state_feed is not None:
+            self.state_feed.close()
+        if self.sync is not None:
+            self.sync.close()
+        if self.debug_panel is not None:
+            self.debug_panel.close()
+        if self.log_tailer is not None:
+            self.log_tailer.stop()
+        self.alerts.close()
+        self.stop_background_tasks()
+        self.flush_journal()
+        super().closeEvent(event)
+
+    def stop_background_tasks(self):
+        """后台线程以主窗口为父对象，窗口销毁前必须结束，否则Qt会在线程运行中销毁QThread并中止程序"""
+        if self.update_service is not None:
+            self.update_service.close()
+        if self.download_task is not None:
+            self.download_task.cancel()  # 已下载的部分保留，下次继续
+            self.download_task.wait()
+        if self.catalog_sync_task is not None:
+            self.catalog_sync_task.wait()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_painted:
+            # 先显示窗口框架，首帧绘制后再加载计时器列表
+            self.first_painted = True
+            if self.profile:
+                self.profile.mark("first paint")
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
         self.load_timers()
+        self.restore_session()
+        self.journal.compact_in_background()
+        if self.log_path:
+            self.start_log_tailer()
+        if self.sync_role:
+            self.start_sync()
+        if self.profile:
+            self.profile.mark("load_timers")
+            print(self.profile.report())
+        # 空闲后再检查更新
+        QTimer.singleShot(UPDATE_CHECK_DELAY, self.check_updates)
 
     def init_ui(self):
         self.setWindowTitle("完美世界国服经典版副本计时器")
@@ -493,25 +1608,171 @@ class MainWindow(QMainWindow):
         self.timer_container.setLayout(self.timer_layout)
         
         # 创建滚动区域
-        scroll_area = QScrollArea()
-        scroll_area.setWidget(self.timer_container)
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        layout.addWidget(scroll_area)
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidget(self.timer_container)
+        self.scroll_area.setWidgetResizable(True)
+        self.scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        layout.addWidget(self.scroll_area)
+
+        # 列表模式：只绘制可见行，机制很多时开销与行数无关
+        self.timer_model = TimerListModel(self.scheduler, self, on_all_float_closed=self.on_all_float_closed,
+                                          float_factory=self.float_factory)
+        self.timer_view = QListView()
+        self.timer_view.setModel(self.timer_model)
+        self.timer_view.setItemDelegate(TimerDelegate(self.timer_view))
+        self.timer_view.setUniformItemSizes(True)
+        self.timer_view.setSelectionMode(QListView.NoSelection)
+        self.timer_view.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.timer_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.timer_view.hide()
+        layout.addWidget(self.timer_view)
 
     def load_timers(self):
+        # 优先使用目录更新通道下载的timers.json，随程序打包的版本作为后备
+        self.catalog = TimerCatalog(resource_path('timers.json'))
+        paths = (self.catalog_path,) if self.catalog_path else (self.local_catalog_path(), resource_path('timers.json'))
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                self.catalog = TimerCatalog(path).load()
+                break
+            except Exception as e:
+                print(f"Error loading timers: {e}")
+        self.level1_combo.addItems(self.catalog.dungeons())
+        if self.watch_enabled:
+            self.start_catalog_watch()
+
+    def local_catalog_path(self):
+        return os.path.join(data_dir('catalog'), 'timers.json')
+
+    def check_catalog_updates(self):
+        """后台检查目录更新，只下载内容哈希有变化的副本"""
+        if self.catalog_sync_task is not None:
+            return
+        from updater import CatalogSyncTask
+        self.catalog_sync_task = CatalogSyncTask(CATALOG_CHECK_URL, self.catalog.path, self.local_catalog_path(), parent=self)
+        self.catalog_sync_task.updated.connect(self.on_catalog_updated)
+        self.catalog_sync_task.failed.connect(lambda message: print(f"Error syncing timers: {message}"))
+        self.catalog_sync_task.start()
+
+    def on_catalog_updated(self, changed):
+        path = self.local_catalog_path()
+        if self.catalog.path == path:
+            self.reload_catalog()
+            return
+        # 第一次同步：旧目录来自随程序打包的文件，新目录加载成功后才替换，旧目录的缓存保持可用
         try:
-            with open('timers.json', 'r', encoding='utf-8') as f:
-                self.timer_data = json.load(f)
-                self.level1_combo.addItems(self.timer_data.keys())
+            catalog = TimerCatalog(path).load()
+            diff = diff_catalogs(self.catalog.snapshot(), catalog.snapshot())
         except Exception as e:
-            print(f"Error loading timers: {e}")
+            print(f"Error loading synced timers: {e}")
+            return
+        if self.watch_enabled:
+            self.catalog_watcher.removePath(self.catalog.path)
+            self.catalog_watcher.addPath(path)
+        self.catalog = catalog
+        if diff:
+            self.apply_catalog_diff(diff)
+            self.rebuild_log_triggers()
+
+    def start_catalog_watch(self):
+        """监视timers.json，保存后只更新受影响的计时器行"""
+        self.catalog_watcher = QFileSystemWatcher([self.catalog.path], self)
+        self.catalog_watcher.fileChanged.connect(self.on_catalog_file_changed)
+        # 编辑器保存时可能连续触发多次，合并为一次重载
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(50)
+        self.reload_timer.timeout.connect(self.reload_catalog)
+
+    def on_catalog_file_changed(self, path):
+        # 原子替换保存会让监视失效，需要重新加入
+        if path not in self.catalog_watcher.files() and os.path.exists(path):
+            self.catalog_watcher.addPath(path)
+        self.reload_timer.start()
+
+    def reload_catalog(self):
+        begin = time.perf_counter()
+        try:
+            diff = self.catalog.reload()
+        except Exception as e:
+            print(f"Error reloading timers: {e}")
+            return
+        if diff:
+            self.apply_catalog_diff(diff)
+            self.rebuild_log_triggers()
+        self.last_reload_ms = (time.perf_counter() - begin) * 1000
+        print(f"timers.json reloaded in {self.last_reload_ms:.1f} ms")
+
+    def apply_catalog_diff(self, diff):
+        current_level1 = self.level1_combo.currentText()
+        current_level2 = self.level2_combo.currentText()
+        if diff.dungeons_changed:
+            self.level1_combo.blockSignals(True)
+            self.level1_combo.clear()
+            self.level1_combo.addItems(self.catalog.dungeons())
+            self.level1_combo.setCurrentIndex(max(0, self.level1_combo.findText(current_level1)))
+            self.level1_combo.blockSignals(False)
+        if self.level1_combo.currentText() != current_level1:
+            self.update_level2()
+            return
+        if current_level1 in diff.bosses_changed:
+            self.level2_combo.blockSignals(True)
+            self.level2_combo.clear()
+            self.level2_combo.addItems(self.catalog.bosses(current_level1))
+            self.level2_combo.setCurrentIndex(max(0, self.level2_combo.findText(current_level2)))
+            self.level2_combo.blockSignals(False)
+            if self.level2_combo.currentText() != current_level2:
+                self.update_timers()
+                return
+        specs = diff.timers_changed.get((current_level1, current_level2))
+        if specs is not None:
+            self.rebind_timer_rows(specs)
+
+    def rebind_timer_rows(self, entries):
+        """按机制名称原地更新当前BOSS的计时器行，定义未变的计时器保持运行"""
+        if self.list_mode:
+            self.timer_model.update_entries(entries)
+            self.link_timer_rows(entries)
+            self.publish_state_snapshot()
+            return
+        # 定义改变或被删除的计时器先在原位置停止：取出布局后find_timer_row找不到它们，
+        # 停止事件就不会写入会话日志，也不会推送给状态页和跟随者
+        specs = dict(zip(occurrence_keys(spec.name for spec in entries), entries))
+        current = list(self.timer_rows())
+        for key, timer in zip(occurrence_keys(timer.name for timer in current), current):
+            spec = specs.get(key)
+            if spec is None or (timer.time, timer.phases) != (spec.time, spec_phases(spec)):
+                timer.reset_timer()
+        timers = []
+        while self.timer_layout.count():
+            timer = self.timer_layout.takeAt(0).widget()
+            if isinstance(timer, TimerWindow):
+                timers.append(timer)
+        old_rows = dict(zip(occurrence_keys(timer.name for timer in timers), timers))
+        for key, spec in zip(occurrence_keys(spec.name for spec in entries), entries):
+            timer = old_rows.pop(key, None)
+            if timer is None:
+                timer = self.acquire_timer_row(spec)
+                if self.float_windows_enabled:
+                    timer.show_float_window()
+            elif (timer.time, timer.phases) != (spec.time, spec_phases(spec)):
+                timer.bind(spec)
+                if self.float_windows_enabled:
+                    timer.show_float_window()
+            elif timer.description != spec.description:
+                timer.set_description(spec.description)
+            self.timer_layout.addWidget(timer)
+            timer.show()
+        self.release_timer_rows(list(old_rows.values()))
+        self.link_timer_rows(entries)
+        self.publish_state_snapshot()
 
     def update_level2(self):
         self.level2_combo.clear()
         current_level1 = self.level1_combo.currentText()
-        if current_level1 in self.timer_data:
-            self.level2_combo.addItems(self.timer_data[current_level1].keys())
+        self.level2_combo.addItems(self.catalog.bosses(current_level1))
         self.update_timers()
 
     def update_timers(self):
@@ -519,117 +1780,242 @@ class MainWindow(QMainWindow):
         self.float_checkbox.setChecked(False)
         self.float_windows_enabled = False
         
-        # 清除现有计时器
-        while self.timer_layout.count():
-            item = self.timer_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        # 回收现有计时器行
+        self.release_timer_rows()
         
         # 添加新计时器
         current_level1 = self.level1_combo.currentText()
         current_level2 = self.level2_combo.currentText()
+        entries = self.catalog.timers(current_level1, current_level2)
+        self.record_journal(SELECT, d=current_level1, b=current_level2)
+        if self.sync is not None:
+            self.sync.broadcast_select(current_level1, current_level2, [spec.name for spec in entries])
+        
+        self.list_mode = self.list_view_enabled or len(entries) > LIST_VIEW_THRESHOLD
+        self.scroll_area.setVisible(not self.list_mode)
+        self.timer_view.setVisible(self.list_mode)
+        self.timer_model.set_entries(entries if self.list_mode else [])
+        if self.list_mode:
+            self.link_timer_rows(entries)
+            self.publish_state_snapshot()
+            return
         
-        if current_level1 in self.timer_data and current_level2 in self.timer_data[current_level1]:
-            timers = self.timer_data[current_level1][current_level2]
-            # 适配dict和list两种结构
-            if isinstance(timers, dict):
-                for name, data in timers.items():
-                    timer = TimerWindow(name, data["时间"], data["介绍"], on_all_float_closed=self.on_all_float_closed)
-                    timer.setFixedHeight(100)  # 设置固定高度
-                    self.timer_layout.addWidget(timer)
-                    if self.float_windows_enabled:
-                        timer.show_float_window()
-            elif isinstance(timers, list):
-                for data in timers:
-                    name = data.get("name", "计时器")
-                    time = data.get("time", 60)
-                    desc = data.get("description", "")
-                    timer = TimerWindow(name, time, desc, on_all_float_closed=self.on_all_float_closed)
-                    timer.setFixedHeight(100)  # 设置固定高度
-                    self.timer_layout.addWidget(timer)
-                    if self.float_windows_enabled:
-                        timer.show_float_window()
+        self.timer_container.setUpdatesEnabled(False)
+        for spec in entries:
+            timer = self.acquire_timer_row(spec)
+            self.timer_layout.addWidget(timer)
+            timer.show()
+        self.timer_container.setUpdatesEnabled(True)
+        self.link_timer_rows(entries)
+        self.publish_state_snapshot()
 
-    def start_all_timers(self):
-        for i in range(self.timer_layout.count()):
-            timer = self.timer_layout.itemAt(i).widget()
-            if isinstance(timer, TimerWindow) and not timer.timer.isActive():  # 只启动未运行的计时器
-                timer.toggle_timer()
+    def acquire_timer_row(self, spec):
+        """优先从复用池取出计时器行并重新绑定数据"""
+        if self.timer_pool:
+            timer = self.timer_pool.pop()
+            timer.bind(spec)
+        else:
+            timer = TimerWindow(spec, on_all_float_closed=self.on_all_float_closed, scheduler=self.scheduler,
+                                float_factory=self.float_factory)
+            timer.setFixedHeight(100)  # 设置固定高度
+        return timer
 
-    def reset_all_timers(self):
+    def link_timer_rows(self, entries):
+        """按目录中的联动关系，让机制结束时自动启动同一BOSS的其他机制，并绑定各机制的提醒动作
+
+        计时器行与entries顺序一致，按位置对应：同一BOSS下可能有同名机制（如四兄弟的两个转身秒人）
+        """
+        tids = [self.row_tid(row) for row in self.current_timer_rows()]
+        self.row_index = {tid: index for index, tid in enumerate(tids)}
+        by_name = {}
+        for spec, tid in zip(entries, tids):
+            by_name.setdefault(spec.name, []).append(tid)
+        for spec, tid in zip(entries, tids):
+            self.scheduler.engine.link(tid, [target for name in spec.starts for target in by_name.get(name, ())])
+        boss = self.level2_combo.currentText()
+        self.alerts.bind({tid: (spec.name, self.alerts.alerts_for(boss, spec)) for spec, tid in zip(entries, tids)})
+
+    def release_timer_rows(self, timers=None):
+        """把计时器行（默认全部）停止并放回复用池，超出上限的才销毁"""
+        if timers is None:
+            timers = []
+            while self.timer_layout.count():
+                timers.append(self.timer_layout.takeAt(0).widget())
+        for timer in timers:
+            if not isinstance(timer, TimerWindow):
+                continue
+            self.timer_layout.removeWidget(timer)
+            timer.hide_float_window()
+            timer.reset_timer()
+            timer.hide()
+            if len(self.timer_pool) < TIMER_POOL_LIMIT:
+                self.timer_pool.append(timer)
+            else:
+                self.scheduler.remove(timer.timer_id)
+                timer.deleteLater()
+
+    def timer_rows(self):
         for i in range(self.timer_layout.count()):
             timer = self.timer_layout.itemAt(i).widget()
             if isinstance(timer, TimerWindow):
-                timer.reset_timer()
+                yield timer
+
+    def start_all_timers(self):
+        epoch = self.scheduler.engine.clock()  # 同一批启动共享起点，保证完全同步
+        if self.list_mode:
+            self.timer_model.start_all(epoch)
+            return
+        for timer in self.timer_rows():
+            if not timer.is_running():  # 只启动未运行的计时器
+                timer.start_timer(epoch)
+
+    def reset_all_timers(self):
+        if self.list_mode:
+            self.timer_model.reset_all()
+            return
+        for timer in self.timer_rows():
+            timer.reset_timer()
 
     def toggle_float_windows(self, state):
         self.float_windows_enabled = state == Qt.Checked
-        for i in range(self.timer_layout.count()):
-            timer = self.timer_layout.itemAt(i).widget()
-            if isinstance(timer, TimerWindow):
-                if self.float_windows_enabled:
-                    timer.show_float_window()
-                else:
-                    timer.hide_float_window()
+        if self.list_mode:
+            self.timer_model.set_float_windows(self.float_windows_enabled)
+            return
+        for timer in self.timer_rows():
+            if self.float_windows_enabled:
+                timer.show_float_window()
+            else:
+                timer.hide_float_window()
 
     def on_all_float_closed(self):
         self.float_checkbox.setChecked(False)
 
     def check_updates(self):
-        """检查更新"""
-        has_update, new_version, download_url, release_notes, release_date, expected_md5 = check_for_updates()
-        if has_update:
-            message = f'发现新版本 {new_version}\n'
-            if release_date:
-                message += f'发布日期：{release_date}\n'
-            if release_notes:
-                message += f'\n更新内容：\n{release_notes}\n'
-            message += '\n是否下载更新？'
-            
-            reply = QMessageBox.question(
-                self,
-                '发现新版本',
-                message,
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-            )
-            
-            if reply == QMessageBox.StandardButton.Yes:
-                # 创建进度对话框
-                progress = QProgressDialog("正在下载更新...", "取消", 0, 100, self)
-                progress.setWindowModality(Qt.WindowModal)
-                progress.setWindowTitle("下载进度")
-                progress.setAutoClose(True)
-                progress.setAutoReset(True)
-                
-                # 下载文件
-                temp_file = download_file(download_url, progress)
-                if temp_file:
-                    # 验证MD5
-                    actual_md5 = calculate_md5(temp_file)
-                    if actual_md5.lower() == expected_md5.lower():
-                        # 打开下载目录
-                        QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.dirname(temp_file)))
-                        QMessageBox.information(
-                            self,
-                            "下载完成",
-                            f"新版本已下载完成，文件保存在：\n{temp_file}\n\n请关闭当前程序后安装新版本。"
-                        )
-                    else:
-                        QMessageBox.critical(
-                            self,
-                            "校验失败",
-                            "文件校验失败，下载可能不完整或已被篡改。\n请重新下载或联系开发者。"
-                        )
-                        os.remove(temp_file)
+        """在后台检查更新，结果通过信号回到GUI线程"""
+        if self.update_service is None:
+            from updater import UpdateService  # 更新相关模块按需导入，加快启动
+            self.update_service = UpdateService(UPDATE_CHECK_URL, VERSION, parent=self)
+            self.update_service.update_available.connect(self.on_update_available)
+            self.update_service.check_failed.connect(lambda message: print(f"Error checking updates: {message}"))
+        self.update_service.check()
+        self.check_catalog_updates()
 
-    def showEvent(self, event):
-        """窗口显示时检查更新"""
-        super().showEvent(event)
-        # 在新线程中检查更新，避免阻塞UI
-        threading.Thread(target=self.check_updates, daemon=True).start()
+    def on_update_available(self, manifest):
+        new_version = manifest['version']
+        release_notes = manifest.get('release_notes', '')
+        release_date = manifest.get('release_date', '')
+        message = f'发现新版本 {new_version}\n'
+        if release_date:
+            message += f'发布日期：{release_date}\n'
+        if release_notes:
+            message += f'\n更新内容：\n{release_notes}\n'
+        message += '\n是否下载更新？'
+        
+        reply = QMessageBox.question(
+            self,
+            '发现新版本',
+            message,
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        
+        if reply == QMessageBox.StandardButton.Yes:
+            self.download_update(manifest)
+
+    def download_update(self, manifest):
+        """优先用补丁链从当前版本升级，失败时改为下载完整安装包"""
+        from updater import DeltaUpdateTask
+        task = DeltaUpdateTask.for_manifest(manifest, VERSION, parent=self)
+        if task is None:
+            self.download_full_update(manifest)
+            return
+
+        def on_failed(message):
+            print(f"Delta update failed, falling back to full download: {message}")
+            self.download_full_update(manifest)
+
+        self.run_download_task(task, manifest, "正在下载增量更新...", on_failed)
+
+    def download_full_update(self, manifest):
+        """后台下载完整安装包，边下载边计算摘要；取消后保留已下载部分，下次继续"""
+        from updater import DownloadTask
+        task = DownloadTask(manifest['download_url'], segments=manifest.get('segments', 1), parent=self)
+
+        def on_failed(message):
+            QMessageBox.critical(self, "下载错误", f"下载文件时出错：{message}")
+
+        self.run_download_task(task, manifest, "正在下载更新...", on_failed)
+
+    def run_download_task(self, task, manifest, label, on_failed):
+        # 创建进度对话框
+        progress = QProgressDialog(label, "取消", 0, 100, self)
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setWindowTitle("下载进度")
+        progress.setAutoClose(True)
+        progress.setAutoReset(False)
+        self.download_task = task
+
+        def on_progress(downloaded, total):
+            if total:
+                progress.setMaximum(total)
+                progress.setValue(min(downloaded, total))
+            else:
+                progress.setMaximum(0)  # 服务器未提供长度时显示忙碌状态
+
+        def on_succeeded(result):
+            progress.close()
+            # 验证摘要（下载时已计算，无需再次读取文件）
+            if result.verify(manifest.get('md5', ''), manifest.get('sha256', '')):
+                # 打开下载目录
+                QDesktopServices.openUrl(QUrl.fromLocalFile(os.path.dirname(result.path)))
+                QMessageBox.information(
+                    self,
+                    "下载完成",
+                    f"新版本已下载完成，文件保存在：\n{result.path}\n\n请关闭当前程序后安装新版本。"
+                )
+            else:
+                QMessageBox.critical(
+                    self,
+                    "校验失败",
+                    "文件校验失败，下载可能不完整或已被篡改。\n请重新下载或联系开发者。"
+                )
+                os.remove(result.path)
+
+        def on_task_failed(message):
+            progress.close()
+            on_failed(message)
+
+        task.progress.connect(on_progress)
+        task.succeeded.connect(on_succeeded)
+        task.failed.connect(on_task_failed)
+        def on_finished():
+            if self.download_task is task:  # 增量更新失败时已换成完整下载的任务
+                self.download_task = None
+
+        task.finished.connect(task.deleteLater)
+        task.finished.connect(on_finished)
+        progress.canceled.connect(task.cancel)
+        task.start()
 
 if __name__ == '__main__':
+    profile = StartupProfile(_STARTUP_BEGIN) if '--profile-startup' in sys.argv else None
+    if profile:
+        profile.mark("imports")
     app = QApplication(sys.argv)
-    window = MainWindow()
+    if profile:
+        profile.mark("QApplication")
+    control_port = None
+    feed_port = None
+    for arg in sys.argv:
+        if arg == '--control' or arg.startswith('--control='):
+            control_port = int(arg.partition('=')[2] or 47321)
+        if arg == '--feed' or arg.startswith('--feed='):
+            feed_port = int(arg.partition('=')[2] or 47323)
+    options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    window = MainWindow(list_view='--list-view' in sys.argv, overlay='--overlay' in sys.argv,
+                        watch='--watch' in sys.argv, profile=profile, control_port=control_port,
+                        log_path=options.get('log'), log_encoding=options.get('log-encoding', 'utf-8'),
+                        debug_panel='--debug-panel' in sys.argv, sync_role=options.get('sync'),
+                        sync_port=int(options['sync-port']) if 'sync-port' in options else None,
+                        feed_port=feed_port, tenths='--tenths' in sys.argv)
     window.show()
     sys.exit(app.exec()) 
\ No newline at end of file
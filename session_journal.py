@@ -0,0 +1,122 @@
+"""会话日志：只追加记录计时器的启动/停止和副本选择，程序崩溃或关闭后据此恢复
+
+每行一个JSON事件，同时记录单调时钟和墙上时钟。单调时钟在不同进程之间不可比较，
+因此恢复时用墙上时钟换算出新的单调起点。
+计时器按在当前BOSS中的序号（i）记录：同一BOSS下可能有同名机制，名称（m）只用于恢复时核对。
+"""
+import json
+import os
+import threading
+import time
+
+SELECT = "select"
+START = "start"
+STOP = "stop"
+
+
+class SessionState:
+    """回放日志得到的状态：当前选择和正在运行的计时器"""
+
+    def __init__(self):
+        self.dungeon = None
+        self.boss = None
+        self.running = {}  # 序号 -> (机制名称, 预设值, 起点的墙上时钟)
+
+    def apply(self, event):
+        kind = event.get("t")
+        if kind == SELECT:
+            self.dungeon = event.get("d")
+            self.boss = event.get("b")
+            self.running = {}
+        elif kind == START:
+            self.running[event["i"]] = (event["m"], event["p"], event["ew"])
+        elif kind == STOP:
+            self.running.pop(event["i"], None)
+
+    def events(self):
+        """把状态压缩为最少的事件"""
+        if self.dungeon is None and not self.running:
+            return []
+        now = time.time()
+        events = [{"t": SELECT, "d": self.dungeon, "b": self.boss, "wall": now}]
+        for index, (name, period, epoch_wall) in self.running.items():
+            events.append({"t": START, "i": index, "m": name, "p": period, "ew": epoch_wall, "wall": now})
+        return events
+
+    def is_running(self, index, name, period):
+        """序号处记录的计时器是否正在运行，且机制名称和预设值与现在的目录一致"""
+        entry = self.running.get(index)
+        return entry is not None and entry[:2] == (name, period)
+
+    def monotonic_epoch(self, index, mono=None, wall=None):
+        """把记录的墙上时钟起点换算为本进程的单调时钟起点"""
+        _, _, epoch_wall = self.running[index]
+        mono = time.monotonic() if mono is None else mono
+        wall = time.time() if wall is None else wall
+        return mono - (wall - epoch_wall)
+
+
+class SessionJournal:
+    def __init__(self, path):
+        self.path = path
+        self._pending = []
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    def record(self, kind, mono=None, **fields):
+        """登记一个事件；先放入缓冲区，由flush批量写入"""
+        mono = time.monotonic() if mono is None else mono
+        wall = time.time()
+        event = {"t": kind, "mono": mono, "wall": wall}
+        event.update(fields)
+        if "epoch" in fields:
+            # 起点同时换算成墙上时钟，便于跨进程恢复
+            event["ew"] = wall - (mono - event.pop("epoch"))
+        self._pending.append(event)
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    def flush(self):
+        if not self._pending:
+            return
+        lines = "".join(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + "\n"
+                        for event in self._pending)
+        self._pending = []
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def load(self):
+        """回放日志；末尾写了一半的行会被忽略"""
+        state = SessionState()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        state.apply(json.loads(line))
+                    except (ValueError, KeyError):
+                        continue
+        except OSError:
+            pass
+        return state
+
+    def compact(self):
+        """用当前状态的快照替换整个日志"""
+        with self._lock:
+            state = self.load()
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for event in state.events():
+                    f.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def compact_in_background(self):
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
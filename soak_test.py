@@ -0,0 +1,133 @@
+"""长时间运行测试：用虚拟时钟在offscreen Qt下几秒内模拟数小时的使用，检查对象是否泄漏
+
+每一轮：随机切换副本/BOSS、启动全部计时器、开关悬浮窗，并按虚拟时钟推进若干秒。
+每隔一段先回到固定的参考状态（第一个BOSS、关闭悬浮窗），再记录一次Python对象数、Python堆内存（tracemalloc）、存活控件数、原生窗口数、
+悬浮窗实例数和引擎中的计时器数；预热之后任何一项的峰值持续升高超过容差即判定为泄漏，返回非零。
+
+用法：
+    python soak_test.py [--hours 4] [--switches 600] [--samples 20] [--seed 1] [--json 结果.json]
+"""
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from gui_bench import VirtualClock, make_window, process_events
+
+WARMUP_FRACTION = 0.2
+# 预热后允许的增长：相对值 + 绝对值（对象数量会因缓存等有小幅波动）
+GROWTH_TOLERANCE = 0.05
+# 目录中"基准"副本的BOSS机制数：覆盖行模式和列表模式（超过LIST_VIEW_THRESHOLD），
+# 不使用基准测试中的上千个机制，每轮开关悬浮窗的耗时保持在毫秒级
+SOAK_BOSSES = (5, 20, 60)
+GROWTH_SLACK = {"py_objects": 2000, "heap_kb": 512, "widgets": 20, "native_windows": 2,
+                "float_windows": 0, "engine_timers": 0, "timer_pool": 0}
+
+
+def native_window_count(app):
+    """已创建原生窗口句柄的顶层控件数量"""
+    from PyQt5.QtCore import Qt
+    return sum(1 for widget in app.topLevelWidgets() if widget.testAttribute(Qt.WA_WState_Created))
+
+
+def sample(app, window, clock):
+    from main import FloatWindow
+    gc.collect()
+    process_events(app)
+    current, _ = tracemalloc.get_traced_memory()
+    return {
+        "virtual_hours": round((clock.now - clock.start) / 3600, 3),
+        "py_objects": len(gc.get_objects()),
+        "heap_kb": current // 1024,
+        "widgets": len(app.allWidgets()),
+        "native_windows": native_window_count(app),
+        "float_windows": len(FloatWindow._instances),
+        "engine_timers": len(window.scheduler.engine),
+        "timer_pool": len(window.timer_pool),
+    }
+
+
+def settle(app, window, dungeon):
+    """回到参考状态，采样的数值只取决于是否有对象泄漏，而不是采样时恰好所在的BOSS"""
+    window.float_checkbox.setChecked(False)
+    window.level1_combo.setCurrentText(dungeon)
+    window.level2_combo.setCurrentIndex(0)
+    process_events(app)
+
+
+def find_leaks(samples):
+    """预热后的采样分为前后两半：有界的指标后半段峰值不会明显超过前半段峰值。
+    返回[(指标, 前半段峰值, 后半段峰值)]"""
+    settled = samples[max(1, int(len(samples) * WARMUP_FRACTION)):]
+    if len(settled) < 2:
+        return []
+    middle = len(settled) // 2
+    leaks = []
+    for key, slack in GROWTH_SLACK.items():
+        before = max(item[key] for item in settled[:middle])
+        after = max(item[key] for item in settled[middle:])
+        if after > before * (1 + GROWTH_TOLERANCE) + slack:
+            leaks.append((key, before, after))
+    return leaks
+
+
+def run(hours=4.0, switches=600, samples=20, seed=1, overlay=False):
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    rng = random.Random(seed)
+    clock = VirtualClock()
+    tracemalloc.start()
+    window = make_window(app, clock=clock, bosses_with=SOAK_BOSSES, overlay=overlay)
+    engine = window.scheduler.engine
+    dungeons = window.catalog.dungeons()
+    seconds_per_switch = max(1, int(hours * 3600 / switches))
+    sample_every = max(1, switches // samples)
+    history = []
+    begin = time.perf_counter()
+    for index in range(switches):
+        window.level1_combo.setCurrentText(rng.choice(dungeons))
+        bosses = window.catalog.bosses(window.level1_combo.currentText())
+        if bosses:
+            window.level2_combo.setCurrentIndex(rng.randrange(len(bosses)))
+        if rng.random() < 0.7:
+            window.start_all_timers()
+        for _ in range(rng.randint(0, 3)):
+            window.float_checkbox.setChecked(not window.float_checkbox.isChecked())
+        for _ in range(seconds_per_switch):
+            engine.tick(clock.advance())
+        process_events(app)
+        if index % sample_every == 0 or index == switches - 1:
+            settle(app, window, dungeons[0])
+            history.append(sample(app, window, clock))
+    elapsed = time.perf_counter() - begin
+    window.close()
+    process_events(app)
+    tracemalloc.stop()
+    return {"switches": switches, "virtual_hours": hours, "seconds": elapsed, "samples": history,
+            "leaks": find_leaks(history)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="长时间运行与泄漏测试（offscreen Qt）")
+    parser.add_argument("--hours", type=float, default=4.0, help="模拟的虚拟时长（小时）")
+    parser.add_argument("--switches", type=int, default=600, help="切换BOSS的次数")
+    parser.add_argument("--samples", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--overlay", action="store_true", help="使用单窗口悬浮层模式")
+    parser.add_argument("--json", metavar="PATH", help="把采样结果保存为JSON")
+    args = parser.parse_args()
+    result = run(args.hours, args.switches, args.samples, args.seed, args.overlay)
+    columns = list(GROWTH_SLACK)
+    print(f"{'hours':>7} " + " ".join(f"{name:>15}" for name in columns))
+    for item in result["samples"]:
+        print(f"{item['virtual_hours']:7.2f} " + " ".join(f"{item[name]:15d}" for name in columns))
+    print(f"{result['switches']}次切换，模拟{result['virtual_hours']}小时，用时{result['seconds']:.1f}s")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    for key, before, peak in result["leaks"]:
+        print(f"泄漏: {key} {before} -> {peak}")
+    sys.exit(1 if result["leaks"] else 0)
@@ -0,0 +1,223 @@
+"""只读的计时器状态推送：本地HTTP服务，用Server-Sent Events把状态变化即时推给浏览器源等客户端
+
+    GET /        简单的浏览器源页面（直播软件中添加为浏览器源即可显示计时器）
+    GET /events  SSE流：先发送 select 事件（当前BOSS的全部计时器），之后只发送 update 事件
+    GET /state   当前状态的JSON快照
+
+事件内容：
+    event: select  data: {"dungeon": 副本, "boss": BOSS, "timers": [{"name": 名称, "value": 剩余秒数, "running": 0/1}]}
+    event: update  data: [[序号, 剩余秒数, 0/1], ...]
+每个客户端只保存每个计时器最新的一帧；客户端读得慢、发送缓冲区积压时不再写入，
+旧的帧被新值覆盖而不是无限排队，等缓冲区写出后再一次性发送合并后的最新状态。
+"""
+import json
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtNetwork import QAbstractSocket, QHostAddress, QTcpServer
+
+DEFAULT_PORT = 47323
+MAX_REQUEST = 8192
+MAX_BUFFERED = 64 * 1024  # 发送缓冲区超过该大小时暂停写入该客户端
+KEEPALIVE_INTERVAL = 15000
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>副本计时器</title>
+<style>
+body { margin: 0; background: transparent; font-family: "Microsoft YaHei", sans-serif; }
+.timer { display: inline-block; width: 100px; height: 100px; margin: 4px; border-radius: 20px;
+         background: rgba(0, 0, 0, 0.7); color: white; text-align: center; }
+.name { font-size: 14px; padding-top: 8px; }
+.value { font-size: 48px; font-weight: bold; }
+.warning .value { color: red; }
+</style></head>
+<body><div id="timers"></div>
+<script>
+const container = document.getElementById("timers");
+let cells = [];
+function show(cell, value, running) {
+  cell.querySelector(".value").textContent = value;
+  cell.className = "timer" + (value <= 3 ? " warning" : "");  // 与主窗口一致：不论是否运行
+}
+const source = new EventSource("/events");
+source.addEventListener("select", event => {
+  const state = JSON.parse(event.data);
+  container.innerHTML = "";
+  cells = state.timers.map(timer => {
+    const cell = document.createElement("div");
+    cell.innerHTML = '<div class="name"></div><div class="value"></div>';
+    cell.querySelector(".name").textContent = timer.name;
+    show(cell, timer.value, timer.running);
+    container.appendChild(cell);
+    return cell;
+  });
+});
+source.addEventListener("update", event => {
+  for (const [index, value, running] of JSON.parse(event.data)) {
+    if (cells[index]) show(cells[index], value, running);
+  }
+});
+</script></body></html>
+"""
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n".encode('utf-8')
+
+
+def _response(status, content_type, body):
+    head = (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n")
+    return head.encode('ascii') + body
+
+
+class _Client:
+    __slots__ = ('socket', 'request', 'streaming', 'pending', 'snapshot')
+
+    def __init__(self, socket):
+        self.socket = socket
+        self.request = b''
+        self.streaming = False
+        self.pending = {}  # 序号 -> (剩余秒数, 是否运行)，只保留最新值
+        self.snapshot = False  # 是否需要先发送完整的select事件
+
+
+class StateFeed(QObject):
+    """在GUI线程中运行的非阻塞推送服务；状态变化通过 set_snapshot/update 传入"""
+
+    def __init__(self, port=DEFAULT_PORT, parent=None):
+        super().__init__(parent)
+        self.port = port
+        self.server = QTcpServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+        self.clients = []
+        self.dungeon = ""
+        self.boss = ""
+        self.timers = []  # [[名称, 剩余秒数, 是否运行]]
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self._flush_scheduled = False
+        self.keepalive = QTimer(self)
+        self.keepalive.timeout.connect(self._send_keepalive)
+
+    def listen(self):
+        if not self.server.listen(QHostAddress.LocalHost, self.port):
+            print(f"Error starting state feed: {self.server.errorString()}")
+            return False
+        self.port = self.server.serverPort()
+        self.keepalive.start(KEEPALIVE_INTERVAL)
+        return True
+
+    def close(self):
+        self.keepalive.stop()
+        self.server.close()
+        for client in list(self.clients):
+            client.socket.disconnectFromHost()
+
+    def set_snapshot(self, dungeon, boss, timers):
+        """切换BOSS后发送完整状态；timers为[(名称, 剩余秒数, 是否运行)]"""
+        self.dungeon = dungeon
+        self.boss = boss
+        self.timers = [[name, value, bool(running)] for name, value, running in timers]
+        for client in self.clients:
+            if client.streaming:
+                client.pending.clear()
+                client.snapshot = True
+        self._schedule_flush()
+
+    def update(self, index, value, running):
+        if index >= len(self.timers):
+            return
+        state = self.timers[index]
+        running = bool(running)
+        if state[1] == value and state[2] == running:
+            return
+        state[1] = value
+        state[2] = running
+        for client in self.clients:
+            if client.streaming and not client.snapshot:
+                if index in client.pending:
+                    self.frames_dropped += 1  # 被新值覆盖的旧帧
+                client.pending[index] = (value, running)
+        self._schedule_flush()
+
+    def state(self):
+        return {"dungeon": self.dungeon, "boss": self.boss,
+                "timers": [{"name": name, "value": value, "running": int(running)}
+                           for name, value, running in self.timers]}
+
+    def _schedule_flush(self):
+        # 同一轮事件循环中的所有变化合并为每个客户端一次写入
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self._flush)
+
+    def _flush(self):
+        self._flush_scheduled = False
+        for client in self.clients:
+            self._flush_client(client)
+
+    def _flush_client(self, client):
+        if not client.streaming or client.socket.bytesToWrite() > MAX_BUFFERED:
+            return  # 慢客户端：等缓冲区写出后由bytesWritten再次触发
+        if client.snapshot:
+            client.snapshot = False
+            client.pending.clear()
+            client.socket.write(_sse("select", self.state()))
+            self.frames_sent += 1
+        elif client.pending:
+            frame = [[index, value, int(running)] for index, (value, running) in sorted(client.pending.items())]
+            client.pending.clear()
+            client.socket.write(_sse("update", frame))
+            self.frames_sent += 1
+
+    def _send_keepalive(self):
+        for client in self.clients:
+            if client.streaming and client.socket.bytesToWrite() <= MAX_BUFFERED:
+                client.socket.write(b": keepalive\n\n")
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.setSocketOption(QAbstractSocket.LowDelayOption, 1)
+            client = _Client(socket)
+            socket.readyRead.connect(lambda client=client: self._on_ready_read(client))
+            socket.bytesWritten.connect(lambda _, client=client: self._flush_client(client))
+            socket.disconnected.connect(lambda client=client: self._on_disconnected(client))
+            self.clients.append(client)
+
+    def _on_disconnected(self, client):
+        if client in self.clients:
+            self.clients.remove(client)
+        client.socket.deleteLater()
+
+    def _on_ready_read(self, client):
+        data = bytes(client.socket.readAll())
+        if client.streaming:
+            return  # 推送流是只读的，忽略客户端发来的数据
+        client.request += data
+        if b"\r\n\r\n" not in client.request:
+            if len(client.request) > MAX_REQUEST:
+                client.socket.disconnectFromHost()
+            return
+        request_line = client.request.split(b"\r\n", 1)[0].decode('latin-1')
+        parts = request_line.split()
+        method, path = (parts[0], parts[1].split('?', 1)[0]) if len(parts) >= 2 else ("", "")
+        socket = client.socket
+        if method != "GET":
+            socket.write(_response("405 Method Not Allowed", "text/plain", b"read only"))
+        elif path == "/events":
+            socket.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                         b"Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n"
+                         b"Connection: keep-alive\r\n\r\nretry: 1000\n\n")
+            client.streaming = True
+            client.snapshot = True
+            self._flush_client(client)
+            return
+        elif path == "/state":
+            body = json.dumps(self.state(), ensure_ascii=False).encode('utf-8')
+            socket.write(_response("200 OK", "application/json; charset=utf-8", body))
+        elif path == "/":
+            socket.write(_response("200 OK", "text/html; charset=utf-8", PAGE.encode('utf-8')))
+        else:
+            socket.write(_response("404 Not Found", "text/plain", b"not found"))
+        socket.disconnectFromHost()
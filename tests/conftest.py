@@ -0,0 +1,30 @@
+"""测试公共设置：无界面运行Qt，用户数据写到临时目录"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ['XDG_CACHE_HOME'] = tempfile.mkdtemp(prefix='perfect-timer-test-')
+os.environ['LOCALAPPDATA'] = os.environ['XDG_CACHE_HOME']
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def wait_until(app, predicate, timeout=5.0):
+    """处理事件直到条件成立；超时返回False"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        app.processEvents()
+        if predicate():
+            return True
+        time.sleep(0.005)
+    app.processEvents()
+    return predicate()
@@ -0,0 +1,32 @@
+"""倒计时提醒：目录中的提醒只接受安全的动作，格式错误的项被忽略"""
+import json
+
+from alerts import AlertSpec, DEFAULT_TIMEOUT, normalize_alerts
+from timer_catalog import TimerCatalog
+
+
+def test_catalog_alerts_reject_untrusted_actions():
+    value = [{"at": 3, "sound": "warn.wav"}, {"at": 2, "sound": "../warn.wav"},
+             {"at": 1, "webhook": "http://127.0.0.1:8080/hook"}, {"at": 0, "command": "dodge.bat"}]
+    assert normalize_alerts(value) == (AlertSpec(3, "sound", "warn.wav", DEFAULT_TIMEOUT),)
+    assert len(normalize_alerts(value, trusted=True)) == 4
+
+
+def test_malformed_alerts_are_skipped():
+    value = [{"at": "soon", "notify": "躲圈"}, {"at": 5, "notify": "躲圈", "timeout": None},
+             {"at": [1], "notify": "躲圈"}, "notify", {"at": "4", "notify": "准备"}]
+    assert normalize_alerts(value) == (AlertSpec(4, "notify", "准备", DEFAULT_TIMEOUT),)
+
+
+def test_catalog_loads_with_malformed_alert(tmp_path):
+    path = tmp_path / 'timers.json'
+    timers = {"神月": {"四兄弟": {
+        "转身秒人": {"时间": 30, "介绍": "背对BOSS", "提醒": [{"at": "soon", "notify": "转身"}]},
+        "吸蓝": {"时间": 45, "介绍": "远离", "提醒": {"at": 5, "notify": "准备", "timeout": None}},
+        "分身": {"时间": 60, "介绍": "集火", "提醒": [{"at": 3, "notify": "集火"}]},
+    }}}
+    path.write_text(json.dumps(timers, ensure_ascii=False), encoding='utf-8')
+    catalog = TimerCatalog(str(path), cache_dir=str(tmp_path)).load()
+    specs = catalog.timers("神月", "四兄弟")
+    assert [spec.name for spec in specs] == ["转身秒人", "吸蓝", "分身"]
+    assert [spec.alerts for spec in specs] == [(), (), (AlertSpec(3, "notify", "集火", DEFAULT_TIMEOUT),)]
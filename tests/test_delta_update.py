@@ -0,0 +1,96 @@
+"""补丁链升级：用本机的HTTP服务器提供补丁，检查成功和失败后下载目录中留下的文件"""
+import functools
+import hashlib
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from delta import make_delta
+from updater import DeltaUpdateTask
+
+VERSIONS = ['1.0', '1.1', '1.2', '1.3']
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def release(tmp_path):
+    """生成各版本的程序和相邻版本之间的补丁，返回(服务器地址, 各版本内容)"""
+    served = tmp_path / 'served'
+    served.mkdir()
+    builds = [bytes(range(256)) * 64 + f'build {version}'.encode() * (i + 1) for i, version in enumerate(VERSIONS)]
+    for old, new, data in zip(VERSIONS, VERSIONS[1:], zip(builds, builds[1:])):
+        (served / f'{old}-{new}.patch').write_bytes(make_delta(*data))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(served)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}', builds
+    server.shutdown()
+    server.server_close()
+
+
+def manifest(url, builds, final_sha256=None):
+    patches = [{'from': old, 'to': new, 'url': f'{url}/{old}-{new}.patch',
+                'sha256': hashlib.sha256(make_delta(a, b)).hexdigest()}
+               for old, new, a, b in zip(VERSIONS, VERSIONS[1:], builds, builds[1:])]
+    return {'version': VERSIONS[-1], 'download_url': f'{url}/timer.exe', 'patches': patches,
+            'sha256': final_sha256 or hashlib.sha256(builds[-1]).hexdigest()}
+
+
+def leftovers(dest):
+    return sorted(name for name in os.listdir(dest) if name != 'patches')
+
+
+def make_task(tmp_path, data, builds):
+    source = tmp_path / 'timer.exe'
+    source.write_bytes(builds[0])
+    return DeltaUpdateTask(data, VERSIONS[0], str(source), dest_dir=str(tmp_path / 'downloads'))
+
+
+def test_chain_produces_target_only(qapp, tmp_path, release):
+    url, builds = release
+    task = make_task(tmp_path, manifest(url, builds), builds)
+    assert len(task.chain) == 3
+    result = task._run()
+    assert open(result.path, 'rb').read() == builds[-1]
+    assert leftovers(task.dest_dir) == ['timer.exe']
+
+
+def test_failed_step_removes_intermediates(qapp, tmp_path, release):
+    url, builds = release
+    data = manifest(url, builds)
+    data['patches'][-1]['sha256'] = '0' * 64  # 最后一个补丁校验失败
+    task = make_task(tmp_path, data, builds)
+    with pytest.raises(IOError):
+        task._run()
+    assert leftovers(task.dest_dir) == []
+    # 重试也不会累积中间文件
+    with pytest.raises(IOError):
+        task._run()
+    assert leftovers(task.dest_dir) == []
+
+
+def test_failed_final_verify_removes_everything(qapp, tmp_path, release):
+    url, builds = release
+    task = make_task(tmp_path, manifest(url, builds, final_sha256='0' * 64), builds)
+    with pytest.raises(IOError):
+        task._run()
+    assert leftovers(task.dest_dir) == []
+
+
+def test_existing_download_survives_early_failure(qapp, tmp_path, release):
+    url, builds = release
+    data = manifest(url, builds)
+    data['patches'][0]['sha256'] = '0' * 64
+    task = make_task(tmp_path, data, builds)
+    os.makedirs(task.dest_dir)
+    # 之前完整下载的同名文件不是本次写出的，不应被删除
+    with open(os.path.join(task.dest_dir, 'timer.exe'), 'wb') as f:
+        f.write(builds[-1])
+    with pytest.raises(IOError):
+        task._run()
+    assert leftovers(task.dest_dir) == ['timer.exe']
@@ -0,0 +1,141 @@
+"""局域网同步：同一台机器上的一个主控和几个跟随者通过组播互相通信"""
+import random
+import time
+
+import pytest
+
+from conftest import wait_until
+from lan_sync import FOLLOWER, LEADER, SELECT, START, SNAPSHOT, LanSync, decode, encode, names_crc
+
+NAMES = ["转身秒人", "吸蓝", "转身秒人"]
+
+
+class Handler:
+    """记录收到的同步事件；主控用running提供快照"""
+
+    def __init__(self, running=()):
+        self.running = list(running)
+        self.selected = None
+        self.snapshots = []
+        self.starts = []
+        self.stops = []
+
+    def sync_state(self):
+        return "神月", "四兄弟", NAMES, self.running
+
+    def apply_sync_select(self, dungeon, boss, crc):
+        self.selected = (dungeon, boss)
+        return crc == names_crc(NAMES)
+
+    def apply_sync_snapshot(self, running):
+        self.snapshots.append(running)
+
+    def apply_sync_start(self, indices, epoch):
+        self.starts.append((indices, epoch))
+
+    def apply_sync_stop(self, indices):
+        self.stops.append(indices)
+
+
+@pytest.fixture
+def port():
+    return random.randint(40000, 60000)
+
+
+@pytest.fixture
+def instances(qapp):
+    created = []
+    yield created
+    for sync in created:
+        sync.close()
+
+
+def make(instances, handler, role, port, clock=time.monotonic):
+    sync = LanSync(handler, role, clock=clock, port=port)
+    if not sync.start():
+        pytest.skip("UDP multicast is not available")
+    instances.append(sync)
+    return sync
+
+
+def joined(app, followers, handlers):
+    """等待跟随者估计出时钟偏差并收到快照"""
+    return wait_until(app, lambda: all(sync.offset.ready and sync.last_seq is not None for sync in followers)
+                      and all(handler.snapshots for handler in handlers))
+
+
+def test_encode_decode_roundtrip():
+    data = encode(SNAPSHOT, 7, 3, dungeon="神月", boss="四兄弟", crc=names_crc(NAMES), running=[(2, 12.5)])
+    kind, session, seq, fields = decode(data)
+    assert (kind, session, seq) == (SNAPSHOT, 7, 3)
+    assert fields == {'crc': names_crc(NAMES), 'dungeon': "神月", 'boss': "四兄弟", 'running': [(2, 12.5)]}
+    assert decode(encode(START, 7, 4, epoch=1.0, indices=[0, 2]))[3] == {'epoch': 1.0, 'indices': [0, 2]}
+    with pytest.raises(ValueError):
+        decode(b'XX' + data[2:])
+    with pytest.raises(ValueError):
+        decode(data[:-3])
+
+
+def test_followers_join_and_follow_leader(qapp, instances, port):
+    leader_handler = Handler(running=[(1, 100.0)])
+    leader = make(instances, leader_handler, LEADER, port)
+    handlers = [Handler(), Handler()]
+    # 跟随者的时钟比主控快50秒，起点应换算到各自的时钟
+    followers = [make(instances, handler, FOLLOWER, port, clock=lambda: time.monotonic() + 50)
+                 for handler in handlers]
+    # 主控发出任意报文后跟随者才知道它的地址
+    leader.broadcast_select("神月", "四兄弟", NAMES)
+    assert joined(qapp, followers, handlers)
+    for sync, handler in zip(followers, handlers):
+        assert handler.selected == ("神月", "四兄弟")
+        assert sync.catalog_matches
+        assert sync.offset.offset == pytest.approx(-50, abs=0.05)
+        (index, epoch), = handler.snapshots[-1]
+        assert index == 1 and epoch == pytest.approx(150.0, abs=0.05)
+
+    leader.timer_started(0, 200.0)
+    leader.timer_started(2, 200.0)
+    assert wait_until(qapp, lambda: all(handler.starts for handler in handlers))
+    for handler in handlers:
+        (indices, epoch), = handler.starts
+        assert indices == [0, 2] and epoch == pytest.approx(250.0, abs=0.05)
+
+    leader.timer_stopped(2)
+    assert wait_until(qapp, lambda: all(handler.stops for handler in handlers))
+    assert all(handler.stops == [[2]] for handler in handlers)
+
+    leader.broadcast_select("神月", "其他", ["另一个机制"])
+    assert wait_until(qapp, lambda: all(handler.selected == ("神月", "其他") for handler in handlers))
+    assert not any(sync.catalog_matches for sync in followers)
+    # 目录不一致时不应用启动
+    leader.timer_started(0, 300.0)
+    wait_until(qapp, lambda: False, timeout=0.2)
+    assert all(len(handler.starts) == 1 for handler in handlers)
+
+
+def test_follower_resyncs_after_lost_message(qapp, instances, port):
+    leader_handler = Handler()
+    leader = make(instances, leader_handler, LEADER, port)
+    handler = Handler()
+    follower = make(instances, handler, FOLLOWER, port)
+    leader.broadcast_select("神月", "四兄弟", NAMES)
+    assert joined(qapp, [follower], [handler])
+    snapshots = len(handler.snapshots)
+    # 模拟丢包：跳过一个序号，跟随者应丢弃后续报文并重新请求快照
+    leader.seq += 1
+    leader_handler.running = [(0, 10.0)]
+    leader.timer_started(0, 10.0)
+    assert wait_until(qapp, lambda: len(handler.snapshots) > snapshots)
+    assert handler.starts == []
+    (index, epoch), = handler.snapshots[-1]
+    assert index == 0 and epoch == pytest.approx(10.0, abs=0.05)
+
+
+def test_follower_ignores_other_messages(qapp, instances, port):
+    handler = Handler()
+    follower = make(instances, handler, FOLLOWER, port)
+    follower.socket.writeDatagram(b'not a sync message', follower.group, port)
+    follower.socket.writeDatagram(encode(SELECT, 1, 1, dungeon="神月", boss="四兄弟", crc=0), follower.group, port)
+    wait_until(qapp, lambda: False, timeout=0.2)
+    # 第一条有效报文只用来发现主控，快照之前不应用任何事件
+    assert handler.selected is None
@@ -0,0 +1,98 @@
+"""战斗日志跟踪：向合成的日志文件追加内容并检查触发"""
+import time
+from datetime import datetime
+
+from log_tailer import LogTailer, TriggerAutomaton, parse_timestamp
+
+
+def stamp(text):
+    return datetime.strptime(text, '%Y-%m-%d %H:%M:%S').timestamp()
+
+
+def append(path, text, encoding='utf-8'):
+    with open(path, 'a', encoding=encoding) as f:
+        f.write(text)
+
+
+def test_automaton_finds_overlapping_phrases():
+    automaton = TriggerAutomaton([("转身秒人", 0), ("秒人", 1), ("吸蓝", 2), ("he", 3), ("she", 4), ("hers", 5)])
+    assert automaton.search("怒目 转身秒人，随后吸蓝") == [0, 1, 2]
+    assert automaton.search("ushers") == [4, 3, 5]
+    assert automaton.search("没有触发") == []
+    automaton.add("触发", 6)
+    assert automaton.search("没有触发") == [6]
+
+
+def test_parse_timestamp_formats():
+    assert parse_timestamp("[2024-03-21 20:15:03] 怒目 吸蓝") == stamp('2024-03-21 20:15:03')
+    assert parse_timestamp("2024/03/21 20:15:03.250 怒目") == stamp('2024-03-21 20:15:03') + 0.25
+    now = stamp('2024-03-22 00:00:10')
+    # 只有时分秒、晚于当前时间：属于前一天
+    assert parse_timestamp("[23:59:58] 怒目", now=now) == stamp('2024-03-21 23:59:58')
+    assert parse_timestamp("[00:00:05] 怒目", now=now) == stamp('2024-03-22 00:00:05')
+    assert parse_timestamp("怒目 吸蓝") is None
+
+
+def test_poll_reads_only_appended_lines(tmp_path):
+    path = str(tmp_path / 'combat.log')
+    append(path, "[2024-03-21 20:15:00] 怒目 转身秒人\n")
+    hits = []
+    tailer = LogTailer(path, TriggerAutomaton([("转身秒人", 0), ("吸蓝", 1)]),
+                       lambda value, when: hits.append((value, when)))
+    # 从文件末尾开始，已有的内容不触发
+    assert tailer.poll() == 0 and hits == []
+
+    append(path, "[2024-03-21 20:15:03] 玩家甲 造成了 12345 点伤害\n[2024-03-21 20:15:04] 怒目 吸")
+    assert tailer.poll() == 1 and hits == []
+    # 不完整的行等到换行写入后才处理
+    append(path, "蓝\n")
+    assert tailer.poll() == 1
+    assert hits == [(1, stamp('2024-03-21 20:15:04'))]
+    assert tailer.poll() == 0
+    assert tailer.lines_scanned == 2
+
+
+def test_poll_restarts_after_truncation(tmp_path):
+    path = str(tmp_path / 'combat.log')
+    append(path, "[2024-03-21 20:15:00] 怒目 转身秒人\n" * 3)
+    hits = []
+    tailer = LogTailer(path, TriggerAutomaton([("转身秒人", 0)]), lambda value, when: hits.append(value),
+                       from_end=False)
+    assert tailer.poll() == 3 and hits == [0, 0, 0]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[2024-03-21 20:20:00] 怒目 转身秒人\n")
+    assert tailer.poll() == 1 and len(hits) == 4
+
+
+def test_encoding_and_missing_timestamp(tmp_path):
+    path = str(tmp_path / 'combat.log')
+    append(path, "")
+    hits = []
+    tailer = LogTailer(path, TriggerAutomaton([("吸蓝", 1)]), lambda value, when: hits.append((value, when)),
+                       encoding='gbk')
+    tailer.poll()
+    before = time.time()
+    append(path, "怒目 吸蓝\n", encoding='gbk')
+    tailer.poll()
+    (value, when), = hits
+    # 没有时间戳的行按处理时间计时
+    assert value == 1 and before <= when <= time.time()
+
+
+def test_background_thread_follows_file(tmp_path):
+    path = str(tmp_path / 'combat.log')
+    append(path, "")
+    hits = []
+    tailer = LogTailer(path, TriggerAutomaton([("转身秒人", 0)]), lambda value, when: hits.append(value),
+                       poll_interval=0.01)
+    tailer.start()
+    try:
+        while tailer.offset is None:  # 等第一次读取记下文件末尾
+            time.sleep(0.01)
+        append(path, "[2024-03-21 20:15:00] 怒目 转身秒人\n")
+        deadline = time.monotonic() + 2
+        while not hits and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        tailer.stop()
+    assert hits == [0]
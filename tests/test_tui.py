@@ -0,0 +1,39 @@
+"""终端模式：按键处理（--headless中每行是一个按键）"""
+import json
+
+import pytest
+
+from timer_catalog import TimerCatalog
+from timer_engine import TimerEngine
+from tui import TimerBoard
+
+
+@pytest.fixture
+def board(tmp_path):
+    bosses = {boss: {f"机制{i}": {"时间": 30, "介绍": ""} for i in range(3)} for boss in ("甲", "乙", "丙")}
+    path = tmp_path / 'timers.json'
+    path.write_text(json.dumps({"副本一": bosses, "副本二": bosses}, ensure_ascii=False), encoding='utf-8')
+    board = TimerBoard(TimerCatalog(str(path), cache_dir=str(tmp_path)).load(), TimerEngine(clock=lambda: 0.0))
+    board.select(0, 1)
+    return board
+
+
+def running(board):
+    return [board.engine.is_running(tid) for tid in board.tids]
+
+
+def test_keys_switch_boss_and_dungeon(board):
+    assert board.handle_key("]") and board.boss == "丙"
+    assert board.handle_key("[") and board.boss == "乙"
+    assert board.handle_key("}") and board.dungeon == "副本二"
+    assert board.handle_key("{") and board.dungeon == "副本一"
+    assert not board.handle_key("q")
+
+
+def test_whole_lines_are_not_keys(board):
+    for line in ("[]", "{}", "][", "12", "²", "abc"):
+        assert board.handle_key(line)
+    assert (board.dungeon, board.boss) == ("副本一", "乙")
+    assert running(board) == [False, False, False]
+    board.handle_key("2")
+    assert running(board) == [False, True, False]
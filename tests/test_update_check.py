@@ -0,0 +1,128 @@
+"""更新检查：用本机的HTTP服务器代替更新服务器"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import wait_until
+from updater import CheckPolicy, ManifestCache, UpdateService, fetch_manifest
+
+ETAG = '"v2"'
+
+
+class ManifestServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ManifestHandler)
+        self.manifest = {'version': '2.0.0'}
+        self.status = 200
+        self.delay = 0.0
+        self.requests = []
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}/version.json'
+
+
+class ManifestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        time.sleep(server.delay)
+        if server.status != 200:
+            self.send_error(server.status)
+            return
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(server.manifest).encode('utf-8')
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ManifestServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_uses_etag_and_cache(server, tmp_path):
+    cache = ManifestCache(str(tmp_path / 'version.json'))
+    assert fetch_manifest(server.url, cache) == ({'version': '2.0.0'}, False)
+    assert 'If-None-Match' not in server.requests[-1]
+
+    # 新的缓存对象从磁盘读取上次的ETag，服务器返回304
+    cache = ManifestCache(str(tmp_path / 'version.json'))
+    assert cache.etag == ETAG
+    assert fetch_manifest(server.url, cache) == ({'version': '2.0.0'}, True)
+    assert server.requests[-1]['If-None-Match'] == ETAG
+
+
+def test_fetch_times_out(server, tmp_path):
+    server.delay = 1.0
+    cache = ManifestCache(str(tmp_path / 'version.json'))
+    begin = time.monotonic()
+    with pytest.raises(Exception, match='timed out'):
+        fetch_manifest(server.url, cache, timeout=0.2)
+    assert time.monotonic() - begin < 0.9
+
+
+def test_policy_backs_off_exponentially():
+    now = [0.0]
+    policy = CheckPolicy(max_checks=5, base_delay=30, max_delay=100, clock=lambda: now[0])
+    assert policy.can_check()
+    policy.record_attempt()
+    assert policy.record_failure() == 30
+    assert not policy.can_check()
+    now[0] = 30
+    assert policy.can_check()
+    assert policy.record_failure() == 60
+    assert policy.record_failure() == 100
+    policy.record_success()
+    assert policy.can_check()
+    for _ in range(4):
+        policy.record_attempt()
+    assert not policy.can_check()
+
+
+def test_service_reports_update(qapp, server, tmp_path):
+    service = UpdateService(server.url, '1.0.0', cache_path=str(tmp_path / 'version.json'))
+    found = []
+    service.update_available.connect(found.append)
+    assert service.check()
+    assert not service.check()  # 正在检查
+    assert wait_until(qapp, lambda: found and service.worker is None)
+    assert found == [{'version': '2.0.0'}]
+    service.close()
+
+
+def test_service_retries_after_failure(qapp, server, tmp_path):
+    server.status = 500
+    policy = CheckPolicy(max_checks=2, base_delay=0.05)
+    service = UpdateService(server.url, '2.0.0', cache_path=str(tmp_path / 'version.json'), policy=policy)
+    failures = []
+    current = []
+    service.check_failed.connect(failures.append)
+    service.up_to_date.connect(lambda: current.append(True))
+    assert service.check()
+    assert wait_until(qapp, lambda: failures)
+    server.status = 200
+    # 退避结束后自动重试一次
+    assert wait_until(qapp, lambda: current)
+    assert len(server.requests) == 2 and policy.failures == 0
+    assert not service.check()  # 已达本次运行的检查上限
+    service.close()
@@ -0,0 +1,116 @@
+"""推进耗时统计：记录每次唤醒的计划时刻与实际时刻之差、处理耗时和数字图集重建次数
+
+不依赖Qt；未启用时调度器完全不调用这里的代码。
+"""
+import json
+import math
+import time
+from bisect import bisect_left
+from collections import deque
+
+# 延迟直方图各桶的上限（毫秒），超过最后一个上限的计入溢出桶
+LATENESS_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+DEFAULT_CAPACITY = 3600
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))]
+
+
+class TickStats:
+    """保存最近capacity次推进的明细，以及自启用以来的累计直方图"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.records = deque(maxlen=capacity)  # (墙上时钟, 延迟ms, 耗时ms, 回调数, 图集重建数)
+        self.histogram = [0] * (len(LATENESS_BUCKETS_MS) + 1)
+        self.ticks = 0
+        self.callbacks = 0
+        self.rebuilt = 0
+        self.max_lateness_ms = 0.0
+        self.max_duration_ms = 0.0
+        self.widgets = 0
+        self.windows = 0
+
+    def record(self, scheduled, actual, duration, callbacks, rebuilt):
+        """scheduled/actual为单调时钟秒数，duration为秒"""
+        lateness = max(0.0, (actual - scheduled) * 1000)
+        duration *= 1000
+        self.histogram[bisect_left(LATENESS_BUCKETS_MS, lateness)] += 1
+        self.records.append((time.time(), lateness, duration, callbacks, rebuilt))
+        self.ticks += 1
+        self.callbacks += callbacks
+        self.rebuilt += rebuilt
+        if lateness > self.max_lateness_ms:
+            self.max_lateness_ms = lateness
+        if duration > self.max_duration_ms:
+            self.max_duration_ms = duration
+
+    def sample(self, widgets, windows):
+        """记录当前存活的控件数和可见的顶层窗口数"""
+        self.widgets = widgets
+        self.windows = windows
+
+    def histogram_rows(self):
+        """[(区间标签, 次数)]"""
+        rows = []
+        lower = 0
+        for upper, count in zip(LATENESS_BUCKETS_MS, self.histogram):
+            rows.append((f"{lower}-{upper}ms", count))
+            lower = upper
+        rows.append((f">{lower}ms", self.histogram[-1]))
+        return rows
+
+    def summary(self):
+        lateness = [record[1] for record in self.records]
+        durations = [record[2] for record in self.records]
+        return {
+            "ticks": self.ticks,
+            "lateness_p50_ms": percentile(lateness, 0.5),
+            "lateness_p99_ms": percentile(lateness, 0.99),
+            "lateness_max_ms": self.max_lateness_ms,
+            "duration_p50_ms": percentile(durations, 0.5),
+            "duration_p99_ms": percentile(durations, 0.99),
+            "duration_max_ms": self.max_duration_ms,
+            "callbacks": self.callbacks,
+            "rebuilt": self.rebuilt,
+            "widgets": self.widgets,
+            "windows": self.windows,
+            "histogram": dict(self.histogram_rows()),
+        }
+
+    def export(self, path):
+        """以JSON lines导出明细，最后一行为汇总"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for wall, lateness, duration, callbacks, rebuilt in self.records:
+                f.write(json.dumps({"t": "tick", "wall": wall, "lateness_ms": round(lateness, 3),
+                                    "duration_ms": round(duration, 3), "callbacks": callbacks,
+                                    "rebuilt": rebuilt}, separators=(',', ':')) + "\n")
+            summary = self.summary()
+            summary["t"] = "summary"
+            f.write(json.dumps(summary, ensure_ascii=False, separators=(',', ':')) + "\n")
+        return path
+
+    def clear(self):
+        self.__init__(self.records.maxlen)
+
+    def report(self):
+        """面板显示用的文本"""
+        summary = self.summary()
+        lines = [
+            f"推进次数 {summary['ticks']}   回调 {summary['callbacks']}   图集重建 {summary['rebuilt']}",
+            f"延迟 p50 {summary['lateness_p50_ms']:.2f} ms  p99 {summary['lateness_p99_ms']:.2f} ms  "
+            f"max {summary['lateness_max_ms']:.2f} ms",
+            f"耗时 p50 {summary['duration_p50_ms']:.3f} ms  p99 {summary['duration_p99_ms']:.3f} ms  "
+            f"max {summary['duration_max_ms']:.3f} ms",
+            f"控件 {summary['widgets']}   可见窗口 {summary['windows']}",
+            "",
+            "延迟分布：",
+        ]
+        peak = max(self.histogram) or 1
+        for label, count in self.histogram_rows():
+            bar = "#" * math.ceil(30 * count / peak) if count else ""
+            lines.append(f"  {label:>12} {count:7d} {bar}")
+        return "\n".join(lines)
@@ -0,0 +1,300 @@
+"""计时器目录：统一两种timers.json格式，编译缓存，并按副本延迟加载"""
+import hashlib
+import json
+import os
+import pickle
+import struct
+from collections import namedtuple
+
+from alerts import normalize_alerts
+from app_paths import data_dir
+from timer_engine import Timeline
+
+# triggers: 战斗日志中出现即开始计时的短语（可选）
+# intervals/repeat: 分阶段时间线，空元组表示按time固定循环
+# starts: 每次倒计时结束时联动启动的同一BOSS下的其他机制
+# alerts: 倒计时越过阈值时执行的提醒动作（见alerts.py）
+TimerSpec = namedtuple('TimerSpec', 'name time description triggers intervals repeat starts alerts',
+                       defaults=((), (), 'last', (), ()))
+
+CACHE_MAGIC = b'PTC1'
+CACHE_VERSION = 5
+
+
+def normalize_triggers(value):
+    if not value:
+        return ()
+    if isinstance(value, str):
+        return (value,)
+    return tuple(value)
+
+
+def compile_intervals(time, sequence=None, offset=None, repeat='last'):
+    """把 offset（开场倒计时）+ sequence（后续各区间）编译成时间线区间；普通固定循环返回()"""
+    intervals = list(sequence or [time])
+    if offset:
+        intervals.insert(0, offset)
+    if intervals == [time] and repeat == 'last':
+        return ()
+    return tuple(int(interval) for interval in intervals)
+
+
+def make_spec(name, time, description, triggers=None, sequence=None, offset=None, repeat=None, starts=None,
+              alerts=None):
+    repeat = repeat or 'last'
+    return TimerSpec(name, time, description, normalize_triggers(triggers),
+                     compile_intervals(time, sequence, offset, repeat), repeat, normalize_triggers(starts),
+                     normalize_alerts(alerts))
+
+
+def spec_timeline(spec):
+    """由目录中的分阶段定义生成引擎时间线；普通固定循环返回None"""
+    return Timeline(spec.intervals, spec.repeat) if spec.intervals else None
+
+
+def normalize_timers(timers):
+    """把dict（时间/介绍/...）和list（name/time/description/...）两种结构统一为TimerSpec元组
+
+    可选字段（list格式 / dict格式）：trigger/触发、sequence/序列、offset/开场、repeat/重复、starts/联动、alerts/提醒
+    """
+    if isinstance(timers, dict):
+        return tuple(make_spec(name, data["时间"], data["介绍"], data.get("触发"), data.get("序列"),
+                               data.get("开场"), data.get("重复"), data.get("联动"), data.get("提醒"))
+                     for name, data in timers.items())
+    if isinstance(timers, list):
+        return tuple(make_spec(data.get("name", "计时器"), data.get("time", 60), data.get("description", ""),
+                               data.get("trigger"), data.get("sequence"), data.get("offset"),
+                               data.get("repeat"), data.get("starts"), data.get("alerts"))
+                     for data in timers)
+    return ()
+
+
+def normalize_dungeon(bosses):
+    return {boss: normalize_timers(timers) for boss, timers in bosses.items()}
+
+
+def dungeon_hash(bosses):
+    """副本原始数据的规范化SHA-256，用于目录更新通道比较哪些副本有变化"""
+    canonical = json.dumps(bosses, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def file_hash(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+class TimerCatalog:
+    """timers.json的编译缓存视图
+
+    缓存文件由一个索引头和每个副本独立序列化的数据块组成，启动时只读索引，
+    选中某个副本时才读取并反序列化它的数据块。
+    """
+
+    def __init__(self, path, cache_dir=None):
+        self.path = path
+        self.cache_dir = cache_dir
+        self._index = {}  # 副本名 -> (偏移, 长度)
+        self._order = []
+        self._loaded = {}  # 副本名 -> {BOSS名: (TimerSpec, ...)}
+        self._raw = None
+        self.key = None
+
+    @property
+    def cache_path(self):
+        cache_dir = self.cache_dir or data_dir('cache')
+        name = os.path.basename(self.path)
+        digest = hashlib.sha1(os.path.abspath(self.path).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(cache_dir, f'{name}.{digest}.cache')
+
+    def load(self):
+        """读取目录索引；缓存命中时不解析JSON"""
+        self._loaded = {}
+        self._raw = None
+        stat = os.stat(self.path)
+        if self._read_index(stat):
+            return self
+        self.compile(stat)
+        return self
+
+    def compile(self, stat=None, data=None):
+        """解析JSON并重写缓存"""
+        if stat is None:
+            stat = os.stat(self.path)
+        if data is None:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        self._raw = data
+        self._order = list(data.keys())
+        self._index = {}
+        self._loaded = {}
+        self.key = (file_hash(self.path), stat.st_mtime_ns, stat.st_size)
+        try:
+            self._write_cache()
+        except OSError as e:
+            print(f"Error writing timer cache: {e}")
+        return self
+
+    def reload(self):
+        """重新解析修改过的文件并返回与旧版本的差异；文件未变化时返回None"""
+        stat = os.stat(self.path)
+        if self.key is not None and (stat.st_mtime_ns, stat.st_size) == self.key[1:]:
+            return None
+        old = self.snapshot()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        new = {name: normalize_dungeon(bosses) for name, bosses in data.items()}
+        self.compile(stat, data)
+        self._loaded = new
+        return diff_catalogs(old, new)
+
+    def dungeons(self):
+        return list(self._order)
+
+    def snapshot(self):
+        """加载全部副本，返回 {副本: {BOSS: (TimerSpec, ...)}}"""
+        return {name: self.dungeon(name) for name in self._order}
+
+    def bosses(self, dungeon):
+        return list(self.dungeon(dungeon).keys())
+
+    def timers(self, dungeon, boss):
+        return self.dungeon(dungeon).get(boss, ())
+
+    def triggers(self):
+        """遍历全部副本的触发短语，产出(短语, 副本, BOSS, 机制)"""
+        for dungeon in self._order:
+            for boss, specs in self.dungeon(dungeon).items():
+                for spec in specs:
+                    for phrase in spec.triggers:
+                        yield phrase, dungeon, boss, spec.name
+
+    def dungeon(self, dungeon):
+        """返回某个副本的全部BOSS，首次访问时才加载"""
+        bosses = self._loaded.get(dungeon)
+        if bosses is not None:
+            return bosses
+        if self._raw is not None and dungeon in self._raw:
+            bosses = normalize_dungeon(self._raw[dungeon])
+        elif dungeon in self._index:
+            offset, length = self._index[dungeon]
+            with open(self.cache_path, 'rb') as f:
+                f.seek(offset)
+                bosses = pickle.loads(f.read(length))
+        else:
+            return {}
+        self._loaded[dungeon] = bosses
+        return bosses
+
+    def _read_index(self, stat):
+        """读取缓存头部；缓存缺失、过期或损坏（任何异常）都视为未命中，随后重新编译"""
+        try:
+            with open(self.cache_path, 'rb') as f:
+                if f.read(4) != CACHE_MAGIC:
+                    return False
+                header_size, = struct.unpack('<I', f.read(4))
+                header = pickle.loads(f.read(header_size))
+            if header.get('version') != CACHE_VERSION:
+                return False
+            digest, mtime_ns, size = header['key']
+            if size != stat.st_size:
+                return False
+            if mtime_ns != stat.st_mtime_ns and digest != file_hash(self.path):
+                return False
+            order = [name for name, _, _ in header['dungeons']]
+            index = {name: (offset, length) for name, offset, length in header['dungeons']}
+        except Exception:
+            return False
+        self.key = (digest, stat.st_mtime_ns, size)
+        self._order = order
+        self._index = index
+        return True
+
+    def _write_cache(self):
+        blobs = [pickle.dumps(normalize_dungeon(self._raw[name]), pickle.HIGHEST_PROTOCOL) for name in self._order]
+        entries = []
+        offset = 0
+        for name, blob in zip(self._order, blobs):
+            entries.append((name, offset, len(blob)))
+            offset += len(blob)
+
+        def header_bytes(base):
+            header = {'version': CACHE_VERSION, 'key': self.key,
+                      'dungeons': [(name, base + start, length) for name, start, length in entries]}
+            return pickle.dumps(header, pickle.HIGHEST_PROTOCOL)
+
+        # 偏移量写在头部里，头部长度又依赖偏移量，因此迭代到长度稳定
+        header = header_bytes(0)
+        while True:
+            base = 8 + len(header)
+            new_header = header_bytes(base)
+            if len(new_header) == len(header):
+                header = new_header
+                break
+            header = new_header
+
+        path = self.cache_path
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(CACHE_MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_path, path)
+
+
+class CatalogDiff:
+    """两个目录版本之间的差异，按副本、BOSS和机制名称比较"""
+
+    def __init__(self):
+        self.dungeons_changed = False  # 副本列表（名称或顺序）变化
+        self.bosses_changed = set()  # BOSS列表变化的副本
+        self.timers_changed = {}  # (副本, BOSS) -> 新的TimerSpec元组
+
+    def __bool__(self):
+        return self.dungeons_changed or bool(self.bosses_changed) or bool(self.timers_changed)
+
+
+def diff_catalogs(old, new):
+    """比较两个 {副本: {BOSS: (TimerSpec, ...)}} 结构"""
+    diff = CatalogDiff()
+    diff.dungeons_changed = list(old) != list(new)
+    for dungeon, bosses in new.items():
+        old_bosses = old.get(dungeon, {})
+        if list(old_bosses) != list(bosses):
+            diff.bosses_changed.add(dungeon)
+        for boss, specs in bosses.items():
+            if old_bosses.get(boss) != specs:
+                diff.timers_changed[(dungeon, boss)] = specs
+    return diff
+
+
+def publish_catalog(path, output_dir, version):
+    """发布目录更新：每个副本写成以内容哈希命名的文件，并生成catalog.json清单"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    os.makedirs(os.path.join(output_dir, 'dungeons'), exist_ok=True)
+    entries = []
+    for name, bosses in data.items():
+        digest = dungeon_hash(bosses)
+        body = json.dumps(bosses, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        with open(os.path.join(output_dir, 'dungeons', f'{digest}.json'), 'wb') as f:
+            f.write(body)
+        entries.append({'name': name, 'sha256': digest, 'url': f'dungeons/{digest}.json', 'size': len(body)})
+    manifest = {'version': version, 'dungeons': entries}
+    with open(os.path.join(output_dir, 'catalog.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=4)
+    return manifest
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) != 4:
+        print("用法：python timer_catalog.py timers.json 输出目录 目录版本号")
+        sys.exit(1)
+    result = publish_catalog(sys.argv[1], sys.argv[2], int(sys.argv[3]))
+    print(f"已发布 {len(result['dungeons'])} 个副本")
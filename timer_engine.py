@@ -0,0 +1,313 @@
+"""计时器引擎：不依赖Qt，按列存储所有计时器状态并批量推进
+
+显示规则与原TimerWindow一致：停止时显示预设值，启动时从预设值-1开始，
+到0后循环回预设值-1。剩余秒数由单调时钟起点直接算出，不累积误差。
+
+起点相同的计时器归为一组，用最小堆保存每组的下一个显示边界，
+推进时只处理到期的组；机制再多，只要共享起点就不会增加唤醒次数。
+"""
+import heapq
+import math
+import time
+from array import array
+from bisect import bisect_right
+
+STOPPED = 0
+RUNNING = 1
+WARNING_SECONDS = 3  # 剩余秒数不超过该值时各界面用警告色显示
+
+
+REPEAT_LAST = "last"  # 区间走完后一直重复最后一个区间
+REPEAT_LOOP = "loop"  # 区间走完后从头循环
+REPEAT_ONCE = "once"  # 区间走完后停止
+
+
+class Timeline:
+    """由多个倒计时区间组成的时间线，用于开场与后续循环不同、或只出现一次的机制"""
+    __slots__ = ('intervals', 'repeat', 'cumulative')
+
+    def __init__(self, intervals, repeat=REPEAT_LAST):
+        self.intervals = tuple(max(1, int(interval)) for interval in intervals)
+        self.repeat = repeat
+        self.cumulative = [0]
+        for interval in self.intervals:
+            self.cumulative.append(self.cumulative[-1] + interval)
+
+    def locate(self, elapsed):
+        """返回(区间序号, 显示值)；只出现一次的时间线走完后返回None"""
+        cumulative = self.cumulative
+        total = cumulative[-1]
+        count = len(self.intervals)
+        if elapsed < total:
+            index = bisect_right(cumulative, elapsed) - 1
+            return index, cumulative[index + 1] - 1 - elapsed
+        if self.repeat == REPEAT_ONCE:
+            return None
+        if self.repeat == REPEAT_LOOP:
+            rounds, rest = divmod(elapsed, total)
+            index = bisect_right(cumulative, rest) - 1
+            return rounds * count + index, cumulative[index + 1] - 1 - rest
+        last = self.intervals[-1]
+        rounds, rest = divmod(elapsed - total, last)
+        return count + rounds, last - 1 - rest
+
+    def start_of(self, index):
+        """第index个区间开始时距起点的秒数"""
+        count = len(self.intervals)
+        if index < count:
+            return self.cumulative[index]
+        total = self.cumulative[-1]
+        if self.repeat == REPEAT_LOOP:
+            rounds, rest = divmod(index, count)
+            return rounds * total + self.cumulative[rest]
+        return total + (index - count) * self.intervals[-1]
+
+
+class TimerEngine:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        # 列式存储：下标即计时器id
+        self.periods = array('l')
+        self.epochs = array('d')
+        self.states = array('b')
+        self.values = array('l')  # 最近一次推送给订阅者的显示值
+        self.cycles = array('l')  # 当前所处的区间序号，用于发现区间结束
+        self._callbacks = []
+        self._free = []
+        self._running = set()
+        self._timelines = {}  # id -> Timeline；普通固定周期的计时器不在此表中
+        self._links = {}  # id -> [id, ...]：每个区间结束时启动的其他计时器
+        self._groups = {}  # 起点 -> 运行中的id集合
+        self._heap = []  # (下一个显示边界, 起点)，每组一项
+        self.listeners = []  # listener(事件, id, 起点)，在启动/停止时调用
+
+    def __len__(self):
+        return len(self.periods) - len(self._free)
+
+    def add(self, period, callback=None, timeline=None):
+        """登记一个计时器，返回其id；callback在显示值变化时以新值调用"""
+        period = int(period)
+        if self._free:
+            tid = self._free.pop()
+            self.periods[tid] = period
+            self.epochs[tid] = 0.0
+            self.states[tid] = STOPPED
+            self.values[tid] = period
+            self.cycles[tid] = 0
+            self._callbacks[tid] = callback
+        else:
+            tid = len(self.periods)
+            self.periods.append(period)
+            self.epochs.append(0.0)
+            self.states.append(STOPPED)
+            self.values.append(period)
+            self.cycles.append(0)
+            self._callbacks.append(callback)
+        self.set_timeline(tid, timeline)
+        return tid
+
+    def remove(self, tid):
+        self.stop(tid)
+        self._callbacks[tid] = None
+        self._timelines.pop(tid, None)
+        self._links.pop(tid, None)
+        self._free.append(tid)
+
+    def set_timeline(self, tid, timeline):
+        """设置分阶段时间线；None表示按预设值固定循环。停止时显示第一个区间"""
+        if timeline is None:
+            self._timelines.pop(tid, None)
+            return
+        self._timelines[tid] = timeline
+        self.periods[tid] = timeline.intervals[0]
+        if self.states[tid] == STOPPED:
+            self.values[tid] = self.periods[tid]
+
+    def link(self, tid, targets):
+        """tid的每个区间结束时，以该时刻为起点启动targets"""
+        if targets:
+            self._links[tid] = list(targets)
+        else:
+            self._links.pop(tid, None)
+
+    def subscribe(self, tid, callback):
+        self._callbacks[tid] = callback
+
+    def set_period(self, tid, period):
+        """修改预设值；运行中的计时器保持原起点"""
+        self.periods[tid] = int(period)
+        if self.states[tid] == STOPPED:
+            self.values[tid] = self.periods[tid]
+
+    def start(self, tid, epoch=None):
+        if epoch is None:
+            epoch = self.clock()
+        if self.states[tid] == RUNNING:
+            self._leave_group(tid)
+        self.epochs[tid] = epoch
+        self.states[tid] = RUNNING
+        self._running.add(tid)
+        self._join_group(tid, epoch)
+        located = self._locate(tid, max(epoch, self.clock()))
+        if located is None:
+            return self.stop(tid)
+        self.cycles[tid], self.values[tid] = located
+        self._notify(RUNNING, tid, epoch)
+        return self.values[tid]
+
+    def start_many(self, tids, epoch=None):
+        """同一批计时器共享同一个起点，保证完全同步"""
+        if epoch is None:
+            epoch = self.clock()
+        for tid in tids:
+            self.start(tid, epoch)
+        return epoch
+
+    def stop(self, tid):
+        was_running = self.states[tid] == RUNNING
+        if was_running:
+            self._leave_group(tid)
+            self._running.discard(tid)
+        self.states[tid] = STOPPED
+        self.values[tid] = self.periods[tid]
+        if was_running:
+            self._notify(STOPPED, tid, None)
+        return self.values[tid]
+
+    def is_running(self, tid):
+        return self.states[tid] == RUNNING
+
+    def value(self, tid, now=None):
+        if self.states[tid] != RUNNING:
+            return self.periods[tid]
+        located = self._locate(tid, self.clock() if now is None else now)
+        return self.periods[tid] if located is None else located[1]
+
+    def tick(self, now=None):
+        """推进到期的计时器组，返回[(id, 新值)]并通知订阅者"""
+        if now is None:
+            now = self.clock()
+        heap = self._heap
+        groups = self._groups
+        periods = self.periods
+        epochs = self.epochs
+        values = self.values
+        cycles = self.cycles
+        timelines = self._timelines
+        changed = []
+        finished = []
+        completed = []
+        while heap and heap[0][0] <= now:
+            _, epoch = heapq.heappop(heap)
+            members = groups.get(epoch)
+            if not members:
+                groups.pop(epoch, None)
+                continue
+            elapsed = int(now - epoch)
+            for tid in members:
+                timeline = timelines.get(tid)
+                if timeline is None:
+                    period = periods[tid]
+                    if period < 1:
+                        period = 1
+                    cycle, rest = divmod(elapsed, period)
+                    value = period - 1 - rest
+                else:
+                    located = timeline.locate(elapsed)
+                    if located is None:
+                        finished.append(tid)
+                        if tid in self._links:
+                            completed.append((tid, len(timeline.intervals)))
+                        continue
+                    cycle, value = located
+                if cycle != cycles[tid]:
+                    if cycle > cycles[tid] and tid in self._links:
+                        completed.append((tid, cycle))
+                    cycles[tid] = cycle
+                if value != values[tid]:
+                    values[tid] = value
+                    changed.append((tid, value))
+            heapq.heappush(heap, (epoch + math.floor(now - epoch) + 1, epoch))
+        callbacks = self._callbacks
+        for tid, value in changed:
+            callback = callbacks[tid]
+            if callback is not None:
+                callback(value)
+        for tid in finished:
+            value = self.stop(tid)
+            callback = callbacks[tid]
+            if callback is not None:
+                callback(value)
+        for tid, cycle in completed:
+            # 以区间结束的准确时刻为起点启动联动的机制
+            timeline = timelines.get(tid)
+            boundary = epochs[tid] + (timeline.start_of(cycle) if timeline else cycle * max(1, periods[tid]))
+            for target in self._links[tid]:
+                value = self.start(target, boundary)
+                callback = callbacks[target]
+                if callback is not None:
+                    callback(value)
+        return changed
+
+    def next_deadline(self, now=None):
+        """下一个显示边界的单调时刻；没有运行中的计时器时返回None"""
+        heap = self._heap
+        while heap and not self._groups.get(heap[0][1]):
+            self._groups.pop(heapq.heappop(heap)[1], None)
+        return heap[0][0] if heap else None
+
+    def running(self):
+        return sorted(self._running)
+
+    def _notify(self, event, tid, epoch):
+        for listener in self.listeners:
+            listener(event, tid, epoch)
+
+    def _locate(self, tid, now):
+        elapsed = int(now - self.epochs[tid])
+        timeline = self._timelines.get(tid)
+        if timeline is not None:
+            return timeline.locate(elapsed)
+        period = max(1, self.periods[tid])
+        cycle, rest = divmod(elapsed, period)
+        return cycle, period - 1 - rest
+
+    def _join_group(self, tid, epoch):
+        members = self._groups.get(epoch)
+        if members is None:
+            members = self._groups[epoch] = set()
+            now = self.clock()
+            deadline = epoch + math.floor(now - epoch) + 1 if now >= epoch else epoch + 1
+            heapq.heappush(self._heap, (deadline, epoch))
+        members.add(tid)
+
+    def _leave_group(self, tid):
+        epoch = self.epochs[tid]
+        members = self._groups.get(epoch)
+        if members is not None:
+            members.discard(tid)
+
+
+def benchmark(count=10000, ticks=600):
+    """测量引擎推进吞吐量：count个计时器按虚拟时钟推进ticks秒"""
+    now = [0.0]
+    engine = TimerEngine(clock=lambda: now[0])
+    tids = [engine.add(15 + i % 600) for i in range(count)]
+    engine.start_many(tids)
+    begin = time.perf_counter()
+    for second in range(1, ticks + 1):
+        now[0] = float(second)
+        engine.tick()
+    elapsed = time.perf_counter() - begin
+    return {
+        'timers': count,
+        'ticks': ticks,
+        'seconds': elapsed,
+        'timer_ticks_per_second': count * ticks / elapsed if elapsed else float('inf'),
+    }
+
+
+if __name__ == '__main__':
+    result = benchmark()
+    print(f"{result['timers']}个计时器 x {result['ticks']}次推进: "
+          f"{result['seconds']:.3f}s, {result['timer_ticks_per_second']:,.0f} 计时器次/秒")
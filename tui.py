@@ -0,0 +1,308 @@
+"""终端模式：不导入Qt，只显示倒计时，适合第二台笔记本或小型Linux主机
+
+与主窗口使用同一个timers.json目录和同一个TimerEngine，启动/停止/复位/循环的规则完全相同。
+
+用法：
+    python main.py --tui        全屏终端界面，只重绘发生变化的行
+    python main.py --headless   不控制终端：每行输出一个变化（序号、名称、剩余秒数），从标准输入按行读取按键
+按键：1-9/0 启动或停止第1-10个计时器，a 全部启动，r 全部复位，
+      [ ] 上一个/下一个BOSS，{ } 上一个/下一个副本，q 退出
+"""
+import os
+import queue
+import select
+import sys
+import threading
+import time
+
+from alerts import AlertDispatcher, load_local_alerts
+from app_paths import data_dir, resource_path
+from timer_catalog import TimerCatalog, spec_timeline
+from timer_engine import WARNING_SECONDS, TimerEngine
+
+IDLE_TIMEOUT = 1.0
+WINDOWS_POLL = 0.05
+RESET = "\x1b[0m"
+WARNING = "\x1b[31;1m"
+RUNNING_STYLE = "\x1b[1m"
+DIM = "\x1b[2m"
+
+
+def load_catalog():
+    """与主窗口相同：优先使用目录更新通道下载的timers.json，随程序打包的版本作为后备"""
+    for path in (os.path.join(data_dir('catalog'), 'timers.json'), resource_path('timers.json')):
+        if not os.path.exists(path):
+            continue
+        try:
+            return TimerCatalog(path).load()
+        except Exception as e:
+            print(f"Error loading timers: {e}", file=sys.stderr)
+    return None
+
+
+def display_width(text):
+    """终端显示宽度：中文等全角字符占两列"""
+    return sum(2 if ord(ch) > 0x2e7f else 1 for ch in text)
+
+
+def pad(text, width):
+    return text + " " * max(0, width - display_width(text))
+
+
+class TimerBoard:
+    """终端中一个BOSS的计时器：行的数据与引擎id，行为与主窗口的TimerWindow一致"""
+
+    def __init__(self, catalog, engine, alerts=None):
+        self.catalog = catalog
+        self.engine = engine
+        self.alerts = alerts
+        self.dungeons = catalog.dungeons()
+        self.dungeon_index = 0
+        self.boss_index = 0
+        self.specs = []
+        self.tids = []
+        self.values = []
+        self.dirty = set()  # 显示值变化的行
+        self.layout_changed = True
+
+    @property
+    def dungeon(self):
+        return self.dungeons[self.dungeon_index] if self.dungeons else ""
+
+    @property
+    def bosses(self):
+        return self.catalog.bosses(self.dungeon) if self.dungeons else []
+
+    @property
+    def boss(self):
+        bosses = self.bosses
+        return bosses[self.boss_index] if bosses else ""
+
+    def select(self, dungeon_index, boss_index=0):
+        """切换BOSS：停止并移除当前计时器，再按目录添加新的计时器"""
+        for tid in self.tids:
+            self.engine.remove(tid)
+        self.dungeon_index = dungeon_index % len(self.dungeons) if self.dungeons else 0
+        bosses = self.bosses
+        self.boss_index = boss_index % len(bosses) if bosses else 0
+        self.specs = list(self.catalog.timers(self.dungeon, self.boss)) if bosses else []
+        self.tids = []
+        self.values = []
+        for row, spec in enumerate(self.specs):
+            tid = self.engine.add(spec.time, self._make_callback(row), spec_timeline(spec))
+            self.tids.append(tid)
+            self.values.append(self.engine.value(tid))
+        names = {}  # 同一BOSS下可能有同名机制
+        for spec, tid in zip(self.specs, self.tids):
+            names.setdefault(spec.name, []).append(tid)
+        for spec, tid in zip(self.specs, self.tids):
+            self.engine.link(tid, [target for name in spec.starts for target in names.get(name, ())])
+        if self.alerts is not None:
+            self.alerts.bind({tid: (spec.name, self.alerts.alerts_for(self.boss, spec))
+                              for spec, tid in zip(self.specs, self.tids)})
+        self.layout_changed = True
+
+    def _make_callback(self, row):
+        def callback(value):
+            self.values[row] = value
+            self.dirty.add(row)
+        return callback
+
+    def toggle(self, row):
+        if row >= len(self.tids):
+            return
+        tid = self.tids[row]
+        if self.engine.is_running(tid):
+            self.reset(row)  # 停止时显示预设值
+        else:
+            self.values[row] = self.engine.start(tid)  # 启动时从预设值-1开始
+            self.dirty.add(row)
+
+    def reset(self, row):
+        self.values[row] = self.engine.stop(self.tids[row])
+        self.dirty.add(row)
+
+    def start_all(self):
+        epoch = self.engine.clock()  # 同一批启动共享起点，保证完全同步
+        for row, tid in enumerate(self.tids):
+            if not self.engine.is_running(tid):  # 只启动未运行的计时器
+                self.values[row] = self.engine.start(tid, epoch)
+                self.dirty.add(row)
+
+    def reset_all(self):
+        for row in range(len(self.tids)):
+            self.reset(row)
+
+    def handle_key(self, key):
+        """返回False表示退出"""
+        if key == "q":
+            return False
+        if len(key) == 1 and key.isdecimal():  # --headless中整行是一个按键，"12"不是按键
+            self.toggle((int(key) - 1) % 10)
+        elif key == "a":
+            self.start_all()
+        elif key == "r":
+            self.reset_all()
+        elif key in ("[", "]"):
+            self.select(self.dungeon_index, self.boss_index + (1 if key == "]" else -1))
+        elif key in ("{", "}"):
+            self.select(self.dungeon_index + (1 if key == "}" else -1))
+        return True
+
+    def row_text(self, row, color=True):
+        spec = self.specs[row]
+        value = self.values[row]
+        running = self.engine.is_running(self.tids[row])
+        label = f"{(row + 1) % 10 if row < 10 else ' '} {pad(spec.name, 16)} {value:>5}"
+        if not color:
+            return label
+        if value <= WARNING_SECONDS:  # 与主窗口的time_state一致：不论是否运行
+            return WARNING + label + RESET
+        return (RUNNING_STYLE if running else DIM) + label + RESET
+
+
+class TerminalScreen:
+    """只重写内容变化的行，不整屏刷新"""
+
+    def __init__(self, out):
+        self.out = out
+        self.lines = []
+
+    def enter(self):
+        self.out.write("\x1b[?1049h\x1b[?25l\x1b[2J")  # 备用屏幕、隐藏光标
+        self.out.flush()
+
+    def leave(self):
+        self.out.write("\x1b[?25h\x1b[?1049l")
+        self.out.flush()
+
+    def render(self, lines):
+        chunks = []
+        for row, line in enumerate(lines):
+            if row >= len(self.lines) or self.lines[row] != line:
+                chunks.append(f"\x1b[{row + 1};1H{line}\x1b[K")
+        for row in range(len(lines), len(self.lines)):
+            chunks.append(f"\x1b[{row + 1};1H\x1b[K")
+        self.lines = list(lines)
+        if chunks:
+            self.out.write("".join(chunks))
+            self.out.flush()
+
+
+def board_lines(board):
+    lines = [f"{board.dungeon} / {board.boss}", ""]
+    lines.extend(board.row_text(row) for row in range(len(board.specs)))
+    lines.extend(["", DIM + "1-0 启动/停止  a 全部启动  r 全部复位  [ ] 切换BOSS  { } 切换副本  q 退出" + RESET])
+    return lines
+
+
+class KeyReader:
+    """非阻塞读取按键；终端模式下读单个字符，headless模式下由后台线程按行读取"""
+
+    def __init__(self, line_mode):
+        self.line_mode = line_mode
+        self.saved = None
+        self.windows = sys.platform == 'win32'
+        self.lines = None
+
+    def __enter__(self):
+        if self.line_mode:
+            self.lines = queue.Queue()
+            threading.Thread(target=self._read_lines, daemon=True).start()
+        elif not self.windows and sys.stdin.isatty():
+            import termios
+            import tty
+            self.saved = termios.tcgetattr(sys.stdin)
+            tty.setcbreak(sys.stdin.fileno())
+        return self
+
+    def __exit__(self, *exc):
+        if self.saved is not None:
+            import termios
+            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self.saved)
+
+    def _read_lines(self):
+        for line in sys.stdin:
+            if line.strip():
+                self.lines.put(line.strip())
+        # 输入结束后不再有按键，计时器继续运行直到被中断
+
+    def wait(self, timeout):
+        """最多等待timeout秒，返回读到的按键列表；终端输入结束时返回None"""
+        if self.line_mode:
+            try:
+                return [self.lines.get(timeout=timeout)]
+            except queue.Empty:
+                return []
+        if self.windows:
+            import msvcrt
+            deadline = time.monotonic() + timeout
+            while True:
+                if msvcrt.kbhit():
+                    return [msvcrt.getwch()]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                time.sleep(min(WINDOWS_POLL, remaining))
+        ready, _, _ = select.select([sys.stdin], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        data = os.read(sys.stdin.fileno(), 64).decode('utf-8', errors='ignore')
+        return list(data) if data else None
+
+
+def run(headless=False):
+    catalog = load_catalog()
+    if catalog is None or not catalog.dungeons():
+        print("Error loading timers: no catalog found", file=sys.stderr)
+        return 1
+    engine = TimerEngine()
+    alerts = AlertDispatcher(local=load_local_alerts())
+    alerts.attach(engine)
+    board = TimerBoard(catalog, engine, alerts)
+    board.select(0)
+    out = sys.stdout
+    if sys.platform == 'win32' and not headless:
+        os.system("")  # 打开Windows控制台的ANSI转义序列支持
+    screen = None if headless else TerminalScreen(out)
+    if screen is not None:
+        screen.enter()
+    try:
+        with KeyReader(line_mode=headless) as keys:
+            while True:
+                if board.layout_changed:
+                    board.layout_changed = False
+                    board.dirty = set(range(len(board.specs)))
+                    if headless:
+                        out.write(f"# {board.dungeon}\t{board.boss}\n")
+                if board.dirty:
+                    if headless:
+                        for row in sorted(board.dirty):
+                            out.write(f"{row + 1}\t{board.specs[row].name}\t{board.values[row]}\n")
+                        out.flush()
+                    else:
+                        screen.render(board_lines(board))
+                    board.dirty.clear()
+                deadline = engine.next_deadline()
+                timeout = IDLE_TIMEOUT if deadline is None else max(0.0, deadline - engine.clock())
+                pressed = keys.wait(timeout)
+                if pressed is None:
+                    return 0
+                for key in pressed:
+                    if not board.handle_key(key):
+                        return 0
+                alerts.on_tick(engine.tick())
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        alerts.close()
+        if screen is not None:
+            screen.leave()
+
+
+def main(argv):
+    return run(headless='--headless' in argv)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
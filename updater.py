@@ -0,0 +1,361 @@
+"""更新检查服务：带超时和条件请求，磁盘缓存清单，失败后指数退避
+
+网络请求在工作线程中执行，结果通过信号回到GUI线程。
+"""
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from app_paths import data_dir
+from delta import apply_patch, select_patch_chain
+from downloader import DownloadCancelled, DownloadResult, Downloader
+from timer_catalog import dungeon_hash
+
+# urllib对连接和每次读取使用同一个套接字超时
+REQUEST_TIMEOUT = 10
+MAX_CHECKS_PER_SESSION = 3
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 3600
+
+
+def parse_version(version):
+    """把 "1.10.0" 这样的版本号转成可比较的元组"""
+    parts = []
+    for part in str(version).split('.'):
+        digits = ''.join(ch for ch in part if ch.isdigit())
+        parts.append(int(digits) if digits else 0)
+    return tuple(parts)
+
+
+def is_newer(version, current):
+    return parse_version(version) > parse_version(current)
+
+
+def installed_binary():
+    """打包后的exe路径；源码运行时没有可打补丁的程序，返回None"""
+    if getattr(sys, 'frozen', False):
+        return sys.executable
+    return None
+
+
+class ManifestCache:
+    """保存上次获取的清单及其ETag/Last-Modified，用于条件请求"""
+
+    def __init__(self, path):
+        self.path = path
+        self.etag = None
+        self.last_modified = None
+        self.manifest = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.etag = data.get('etag')
+        self.last_modified = data.get('last_modified')
+        self.manifest = data.get('manifest')
+
+    def save(self, manifest, etag, last_modified):
+        self.manifest = manifest
+        self.etag = etag
+        self.last_modified = last_modified
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'etag': etag, 'last_modified': last_modified, 'manifest': manifest}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def fetch_manifest(url, cache, timeout=REQUEST_TIMEOUT):
+    """获取更新清单；服务器返回304时使用缓存。返回(清单, 是否来自缓存)"""
+    request = urllib.request.Request(url)
+    if cache.manifest is not None:
+        if cache.etag:
+            request.add_header('If-None-Match', cache.etag)
+        if cache.last_modified:
+            request.add_header('If-Modified-Since', cache.last_modified)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            manifest = json.loads(response.read())
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cache.manifest is not None:
+            return cache.manifest, True
+        raise
+    try:
+        cache.save(manifest, etag, last_modified)
+    except OSError as e:
+        print(f"Error caching update manifest: {e}")
+    return manifest, False
+
+
+class CheckPolicy:
+    """限制每次运行的检查次数，失败后按指数退避"""
+
+    def __init__(self, max_checks=MAX_CHECKS_PER_SESSION, base_delay=RETRY_BASE_DELAY,
+                 max_delay=RETRY_MAX_DELAY, clock=time.monotonic):
+        self.max_checks = max_checks
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.checks = 0
+        self.failures = 0
+        self.next_allowed = 0.0
+
+    def can_check(self):
+        return self.checks < self.max_checks and self.clock() >= self.next_allowed
+
+    def record_attempt(self):
+        self.checks += 1
+
+    def record_success(self):
+        self.failures = 0
+        self.next_allowed = 0.0
+
+    def record_failure(self):
+        """记录失败并返回下次重试前需要等待的秒数"""
+        delay = min(self.max_delay, self.base_delay * (2 ** self.failures))
+        self.failures += 1
+        self.next_allowed = self.clock() + delay
+        return delay
+
+
+class _CheckWorker(QThread):
+    succeeded = pyqtSignal(dict, bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, url, cache, timeout, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.cache = cache
+        self.timeout = timeout
+
+    def run(self):
+        try:
+            manifest, cached = fetch_manifest(self.url, self.cache, self.timeout)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.succeeded.emit(manifest, cached)
+
+
+class UpdateService(QObject):
+    """在后台检查更新，结果以信号形式在GUI线程发出"""
+    update_available = pyqtSignal(dict)
+    up_to_date = pyqtSignal()
+    check_failed = pyqtSignal(str)
+
+    def __init__(self, url, current_version, cache_path=None, policy=None, timeout=REQUEST_TIMEOUT, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.current_version = current_version
+        self.cache = ManifestCache(cache_path or os.path.join(data_dir('cache'), 'version.json'))
+        self.policy = policy or CheckPolicy()
+        self.timeout = timeout
+        self.worker = None
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self.check)
+
+    def check(self):
+        """开始一次检查；正在检查、已达上限或处于退避期时返回False"""
+        if self.worker is not None or not self.policy.can_check():
+            return False
+        self.policy.record_attempt()
+        self.worker = _CheckWorker(self.url, self.cache, self.timeout, self)
+        self.worker.succeeded.connect(self._on_succeeded)
+        self.worker.failed.connect(self._on_failed)
+        self.worker.finished.connect(self._on_finished)
+        self.worker.start()
+        return True
+
+    def _on_succeeded(self, manifest, cached):
+        self.policy.record_success()
+        if is_newer(manifest.get('version', ''), self.current_version):
+            self.update_available.emit(manifest)
+        else:
+            self.up_to_date.emit()
+
+    def _on_failed(self, message):
+        delay = self.policy.record_failure()
+        self.check_failed.emit(message)
+        if self.policy.checks < self.policy.max_checks:
+            self.retry_timer.start(int(delay * 1000))
+
+    def _on_finished(self):
+        self.worker.deleteLater()
+        self.worker = None
+
+    def close(self):
+        """停止重试，并等待正在进行的检查结束（最长为请求超时），避免线程运行中被销毁"""
+        self.retry_timer.stop()
+        if self.worker is not None:
+            self.worker.wait()
+
+
+class DownloadTask(QThread):
+    """在后台线程运行Downloader，进度和结果通过信号回到GUI线程"""
+    progress = pyqtSignal(object, object)  # (已下载字节数, 总字节数或None)
+    succeeded = pyqtSignal(object)  # DownloadResult
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, url, dest_dir=None, segments=1, parent=None):
+        super().__init__(parent)
+        self.downloader = Downloader(url, dest_dir or data_dir('downloads'), segments=segments,
+                                     progress=self.progress.emit)
+
+    def cancel(self):
+        self.downloader.cancel()
+
+    def run(self):
+        try:
+            result = self.downloader.run()
+        except DownloadCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(result)
+
+
+class DeltaUpdateTask(QThread):
+    """按清单中的补丁链把当前exe升级到新版本；任何一步失败都发出failed，由调用方改为完整下载"""
+    progress = pyqtSignal(object, object)
+    succeeded = pyqtSignal(object)  # DownloadResult
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, manifest, current_version, source_path, dest_dir=None, parent=None):
+        super().__init__(parent)
+        self.manifest = manifest
+        self.chain = select_patch_chain(manifest.get('patches', []), current_version, manifest['version'])
+        self.source_path = source_path
+        self.dest_dir = dest_dir or data_dir('downloads')
+        self.downloader = None
+        self._cancelled = False
+
+    @classmethod
+    def for_manifest(cls, manifest, current_version, parent=None):
+        """有可用补丁链且程序以exe运行时返回任务，否则返回None"""
+        source_path = installed_binary()
+        if source_path is None or not manifest.get('patches'):
+            return None
+        task = cls(manifest, current_version, source_path, parent=parent)
+        return task if task.chain else None
+
+    def cancel(self):
+        self._cancelled = True
+        if self.downloader is not None:
+            self.downloader.cancel()
+
+    def run(self):
+        try:
+            result = self._run()
+        except DownloadCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(result)
+
+    def _run(self):
+        total = sum(patch.get('size', 0) for patch in self.chain) or None
+        done = 0
+        source = self.source_path
+        target_name = os.path.basename(urllib.parse.unquote(urllib.parse.urlparse(self.manifest['download_url']).path))
+        target = os.path.join(self.dest_dir, target_name)
+        outputs = []  # 本次写出的文件，包括中间版本和最后的目标文件
+        completed = False
+        try:
+            for index, patch in enumerate(self.chain):
+                if self._cancelled:
+                    raise DownloadCancelled()
+                self.downloader = Downloader(
+                    patch['url'], os.path.join(self.dest_dir, 'patches'),
+                    progress=lambda downloaded, _, base=done: self.progress.emit(base + downloaded, total))
+                patch_result = self.downloader.run()
+                if not patch_result.verify(patch.get('md5'), patch.get('sha256')):
+                    raise IOError(f"补丁 {patch['from']} -> {patch['to']} 校验失败")
+                done += patch_result.size
+                output = target if index == len(self.chain) - 1 else f"{target}.{patch['to']}.tmp"
+                outputs.append(output)
+                md5, sha256 = apply_patch(source, patch_result.path, output)
+                os.remove(patch_result.path)
+                if source != self.source_path:
+                    os.remove(source)
+                source = output
+            completed = True
+        finally:
+            # 成功时只保留目标文件；失败或取消时连同写了一半的文件全部删除，重试不会留下完整大小的副本
+            for path in outputs:
+                if (path != target or not completed) and os.path.exists(path):
+                    os.remove(path)
+        result = DownloadResult(target, os.path.getsize(target), md5, sha256)
+        expected_md5 = self.manifest.get('md5')
+        expected_sha256 = self.manifest.get('sha256')
+        if not (expected_md5 or expected_sha256) or not result.verify(expected_md5, expected_sha256):
+            os.remove(target)
+            raise IOError("补丁生成的文件校验失败")
+        return result
+
+
+def sync_catalog(url, cache, current_path, target_path, timeout=REQUEST_TIMEOUT):
+    """按副本哈希只下载有变化的副本，组装后原子替换target_path；返回有变化的副本名列表"""
+    manifest, _ = fetch_manifest(url, cache, timeout)
+    with open(current_path, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    hashes = {name: dungeon_hash(bosses) for name, bosses in current.items()}
+    catalog = {}
+    changed = []
+    for entry in manifest['dungeons']:
+        name = entry['name']
+        if hashes.get(name) == entry['sha256']:
+            catalog[name] = current[name]
+            continue
+        with urllib.request.urlopen(urllib.parse.urljoin(url, entry['url']), timeout=timeout) as response:
+            bosses = json.loads(response.read())
+        if dungeon_hash(bosses) != entry['sha256']:
+            raise IOError(f"副本 {name} 校验失败")
+        catalog[name] = bosses
+        changed.append(name)
+    removed = [name for name in current if name not in catalog]
+    if not changed and not removed and list(current) == list(catalog):
+        return []
+    tmp_path = target_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, target_path)
+    return changed + removed
+
+
+class CatalogSyncTask(QThread):
+    """在后台同步计时器目录"""
+    updated = pyqtSignal(list)
+    failed = pyqtSignal(str)
+
+    def __init__(self, url, current_path, target_path, cache_path=None, timeout=REQUEST_TIMEOUT, parent=None):
+        super().__init__(parent)
+        self.url = url
+        self.current_path = current_path
+        self.target_path = target_path
+        self.cache = ManifestCache(cache_path or os.path.join(data_dir('cache'), 'catalog.json'))
+        self.timeout = timeout
+
+    def run(self):
+        try:
+            changed = sync_catalog(self.url, self.cache, self.current_path, self.target_path, self.timeout)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        if changed:
+            self.updated.emit(changed)